@@ -0,0 +1,97 @@
+"""
+Circuit breaker for calls to external services
+Stops sending traffic to a failing upstream for a cool-down period and reports its state for alerting
+"""
+import time
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker.
+
+    closed:    calls go through; consecutive failures are counted
+    open:      calls are rejected until reset_timeout has passed
+    half_open: a single probe call is let through; success closes, failure re-opens
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            name: Name used in logs and stats
+            failure_threshold: Consecutive failures that trip the breaker
+            reset_timeout: Seconds to stay open before letting a probe through
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.counters = {
+            'successes': 0,
+            'failures': 0,
+            'rejected': 0,
+            'trips': 0
+        }
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go upstream now"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.counters['rejected'] += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.counters['rejected'] += 1
+                return False
+            self._probe_in_flight = True
+
+        return True
+
+    def record_success(self):
+        self.counters['successes'] += 1
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self.state = self.CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.counters['failures'] += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._trip()
+
+    def _trip(self):
+        if self.state != self.OPEN:
+            self.counters['trips'] += 1
+            logger.warning(f"Circuit '{self.name}' opened after {self.consecutive_failures} consecutive failures")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict:
+        """Current state and counters for monitoring/alerting"""
+        return {
+            'name': self.name,
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            **self.counters
+        }
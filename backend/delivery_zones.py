@@ -0,0 +1,193 @@
+"""
+Offline delivery zone index
+Answers delivery distances for well-known Kingston neighbourhoods in-process, without calling the Routes API
+"""
+import os
+import re
+import json
+import logging
+from typing import Dict, List, Optional
+
+from distance_cache import normalize_address
+
+logger = logging.getLogger(__name__)
+
+# Representative road distance / drive time from Washington Gardens for each neighbourhood.
+# Distances are banded per neighbourhood (one value for the whole area), so fees for
+# zone-matched addresses are estimates. Override with a JSON file via DELIVERY_ZONES_PATH.
+# Aliases must only ever mean the Kingston area: bare words used island-wide
+# ("downtown", "mona", abbreviations) need a qualifier.
+DEFAULT_DELIVERY_ZONES: List[Dict] = [
+    {"name": "Washington Gardens", "aliases": ["washington gardens", "washington garden", "wash gardens", "wash garden"],
+     "distance_km": 0.0, "duration_minutes": 0, "lat": 18.0215, "lng": -76.8395},
+    {"name": "Pembrook Hall", "aliases": ["pembrook hall", "pembroke hall"],
+     "distance_km": 1.1, "duration_minutes": 4, "lat": 18.0262, "lng": -76.8335},
+    {"name": "Duhaney Park", "aliases": ["duhaney park", "duhaney"],
+     "distance_km": 1.7, "duration_minutes": 4, "lat": 18.0318, "lng": -76.8440},
+    {"name": "Cooreville Gardens", "aliases": ["cooreville gardens", "cooreville"],
+     "distance_km": 1.8, "duration_minutes": 4, "lat": 18.0185, "lng": -76.8515},
+    {"name": "Patrick City", "aliases": ["patrick city"],
+     "distance_km": 2.3, "duration_minutes": 5, "lat": 18.0290, "lng": -76.8535},
+    {"name": "Olympic Gardens", "aliases": ["olympic gardens"],
+     "distance_km": 2.5, "duration_minutes": 6, "lat": 18.0115, "lng": -76.8255},
+    {"name": "Waterhouse", "aliases": ["waterhouse"],
+     "distance_km": 2.8, "duration_minutes": 6, "lat": 18.0050, "lng": -76.8300},
+    {"name": "Meadowbrook", "aliases": ["meadowbrook"],
+     "distance_km": 3.0, "duration_minutes": 7, "lat": 18.0335, "lng": -76.8225},
+    {"name": "Molynes", "aliases": ["molynes"],
+     "distance_km": 3.4, "duration_minutes": 7, "lat": 18.0210, "lng": -76.8160},
+    {"name": "Red Hills", "aliases": ["red hills"],
+     "distance_km": 4.3, "duration_minutes": 9, "lat": 18.0430, "lng": -76.8200},
+    {"name": "Hagley Park", "aliases": ["hagley park"],
+     "distance_km": 4.4, "duration_minutes": 10, "lat": 18.0140, "lng": -76.8095},
+    {"name": "Havendale", "aliases": ["havendale"],
+     "distance_km": 5.4, "duration_minutes": 12, "lat": 18.0405, "lng": -76.8070},
+    {"name": "Half Way Tree", "aliases": ["half way tree", "halfway tree"],
+     "distance_km": 6.2, "duration_minutes": 14, "lat": 18.0125, "lng": -76.7970},
+    {"name": "Constant Spring", "aliases": ["constant spring"],
+     "distance_km": 7.8, "duration_minutes": 17, "lat": 18.0520, "lng": -76.7950},
+    {"name": "New Kingston", "aliases": ["new kingston"],
+     "distance_km": 8.0, "duration_minutes": 18, "lat": 18.0080, "lng": -76.7850},
+    {"name": "Liguanea", "aliases": ["liguanea"],
+     "distance_km": 9.9, "duration_minutes": 22, "lat": 18.0230, "lng": -76.7700},
+    {"name": "Barbican", "aliases": ["barbican"],
+     "distance_km": 10.1, "duration_minutes": 22, "lat": 18.0330, "lng": -76.7700},
+    {"name": "Downtown Kingston", "aliases": ["downtown kingston"],
+     "distance_km": 10.3, "duration_minutes": 23, "lat": 17.9700, "lng": -76.7920},
+    {"name": "Portmore", "aliases": ["portmore"],
+     "distance_km": 11.5, "duration_minutes": 26, "lat": 17.9550, "lng": -76.8800},
+    {"name": "Mona", "aliases": ["mona kingston", "mona heights", "mona commons", "mona estate", "mona st andrew"],
+     "distance_km": 13.2, "duration_minutes": 29, "lat": 18.0080, "lng": -76.7480},
+    {"name": "Papine", "aliases": ["papine"],
+     "distance_km": 13.9, "duration_minutes": 31, "lat": 18.0180, "lng": -76.7420},
+    {"name": "Spanish Town", "aliases": ["spanish town"],
+     "distance_km": 17.4, "duration_minutes": 39, "lat": 17.9910, "lng": -76.9570},
+]
+
+ORIGIN_ZONE = "Washington Gardens"
+
+# Many Kingston roads are named after other neighbourhoods ("Spanish Town Road", "Molynes Road"),
+# so an area name immediately followed by a street type is not treated as a zone match.
+# "St" before a parish name ("Half Way Tree, St. Andrew") is the parish, not a street.
+PARISH_SAINTS = r'(?:andrew|catherine|thomas|james|ann|mary|elizabeth)'
+STREET_SUFFIXES = rf'(?:road|rd|avenue|ave|drive|dr|boulevard|blvd|street|st(?! {PARISH_SAINTS}\b)|lane|ln|close|crescent|way)'
+
+
+def load_zone_table(path: Optional[str] = None) -> List[Dict]:
+    """
+    Read zone definitions from DELIVERY_ZONES_PATH (JSON list of zones), or return the built-in table
+    """
+    path = path or os.environ.get('DELIVERY_ZONES_PATH')
+    if path:
+        try:
+            with open(path, 'r') as f:
+                zones = json.load(f)
+            logger.info(f"Loaded {len(zones)} delivery zones from {path}")
+            return zones
+        except Exception as e:
+            logger.error(f"Failed to load delivery zones from {path}: {str(e)}")
+    return DEFAULT_DELIVERY_ZONES
+
+
+class AddressMatcher:
+    """
+    Classifies an address into a delivery zone in a single scan.
+    All aliases are compiled into one alternation, longest first, so the regex
+    engine tries every alias at each position instead of looping alias by alias.
+    """
+
+    def __init__(self, zones: List[Dict]):
+        """
+        Args:
+            zones: Zone definitions (name and aliases are used)
+        """
+        self._alias_to_zone: Dict[str, str] = {}
+        for zone in zones:
+            for alias in zone.get('aliases', [zone['name']]):
+                self._alias_to_zone[normalize_address(alias)] = zone['name']
+
+        def alternation(aliases):
+            return '|'.join(re.escape(alias) for alias in sorted(aliases, key=len, reverse=True))
+
+        origin_aliases = [alias for alias, name in self._alias_to_zone.items() if name == ORIGIN_ZONE]
+        other_aliases = [alias for alias, name in self._alias_to_zone.items() if name != ORIGIN_ZONE]
+        branches = []
+        if origin_aliases:
+            # Streets inside Washington Gardens still get free delivery
+            branches.append(rf'\b(?:{alternation(origin_aliases)})\b')
+        if other_aliases:
+            branches.append(rf'\b(?:{alternation(other_aliases)})\b(?! {STREET_SUFFIXES}\b)')
+        self._pattern = re.compile('|'.join(branches)) if branches else None
+
+    def classify(self, address: str) -> Optional[str]:
+        """Return the name of the zone an address falls in, or None"""
+        if self._pattern is None:
+            return None
+        match = self._pattern.search(normalize_address(address))
+        return self._alias_to_zone[match.group(0)] if match else None
+
+    def is_washington_gardens(self, address: str) -> bool:
+        return self.classify(address) == ORIGIN_ZONE
+
+
+_address_matcher: Optional[AddressMatcher] = None
+
+
+def get_address_matcher() -> AddressMatcher:
+    """Shared matcher over the configured zone table, compiled on first use"""
+    global _address_matcher
+    if _address_matcher is None:
+        _address_matcher = AddressMatcher(load_zone_table())
+    return _address_matcher
+
+
+class ZoneIndex:
+    """In-memory index from address text to a known delivery zone"""
+
+    def __init__(self, zones: List[Dict], matcher: Optional[AddressMatcher] = None):
+        """
+        Args:
+            zones: Zone definitions (name, aliases, distance_km, duration_minutes, lat, lng)
+            matcher: Compiled matcher over the same zones (built from zones if omitted)
+        """
+        self.zones = {zone['name']: zone for zone in zones}
+        self.matcher = matcher or AddressMatcher(zones)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'ZoneIndex':
+        """
+        Build the index from DELIVERY_ZONES_PATH (JSON list of zones) or the built-in table
+        """
+        if path:
+            zones = load_zone_table(path)
+            return cls(zones)
+        matcher = get_address_matcher()
+        return cls(load_zone_table(), matcher)
+
+    def match(self, address: str) -> Optional[str]:
+        """Return the name of the zone an address falls in, or None"""
+        return self.matcher.classify(address)
+
+    def lookup(self, address: str) -> Optional[Dict]:
+        """
+        Resolve an address to a zone route without any network hop.
+
+        Returns:
+            Dict with distance_meters, duration_seconds and zone, or None if the address is not in a known zone
+        """
+        zone_name = self.match(address)
+        if zone_name is None:
+            return None
+        return self.route_for_zone(zone_name)
+
+    def route_for_zone(self, zone_name: str) -> Dict:
+        zone = self.zones[zone_name]
+        route = {
+            'distance_meters': int(zone['distance_km'] * 1000),
+            'duration_seconds': int(zone['duration_minutes'] * 60),
+            'zone': zone_name
+        }
+        if 'lat' in zone and 'lng' in zone:
+            route['lat'] = zone['lat']
+            route['lng'] = zone['lng']
+        return route
@@ -0,0 +1,138 @@
+"""
+Route cache for the distance service
+Keeps recently resolved routes in an in-process LRU backed by a MongoDB collection with a TTL index
+"""
+import os
+import re
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# How long a resolved route stays valid (Mongo TTL index and in-process LRU)
+DISTANCE_CACHE_TTL_SECONDS = int(os.environ.get('DISTANCE_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+DISTANCE_CACHE_LRU_SIZE = int(os.environ.get('DISTANCE_CACHE_LRU_SIZE', '2048'))
+
+
+def normalize_address(address: str) -> str:
+    """
+    Normalize a delivery address into a cache key.
+    Lowercases, drops punctuation and collapses whitespace so that
+    "12 Main St., Kingston" and "12 main st kingston" share one entry.
+    """
+    return re.sub(r'[^a-z0-9]+', ' ', (address or '').lower()).strip()
+
+
+class DistanceCache:
+    """Two-tier route cache: in-process LRU in front of a MongoDB collection"""
+
+    def __init__(self, collection=None, ttl_seconds: int = DISTANCE_CACHE_TTL_SECONDS,
+                 lru_size: int = DISTANCE_CACHE_LRU_SIZE):
+        """
+        Args:
+            collection: Motor collection used as the shared tier (None for LRU only)
+            ttl_seconds: Lifetime of a cached route
+            lru_size: Maximum number of routes kept in process memory
+        """
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self._lru = TTLCache(maxsize=lru_size, ttl=ttl_seconds)
+        self.stats_counters = {
+            'lru_hits': 0,
+            'mongo_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'errors': 0
+        }
+
+    async def ensure_indexes(self):
+        """Create the TTL index that expires cached routes in MongoDB"""
+        if self.collection is None:
+            return
+        # TTL indexes only work on BSON dates, so created_at is stored as a datetime here
+        await self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+
+    def get_local(self, key: str) -> Optional[Dict]:
+        """Look up a route in the in-process LRU only (safe to call from sync code)"""
+        route = self._lru.get(key)
+        if route is not None:
+            self.stats_counters['lru_hits'] += 1
+        else:
+            self.stats_counters['misses'] += 1
+        return route
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a route by normalized address key.
+
+        Returns:
+            Dict with distance_meters and duration_seconds, or None on a miss
+        """
+        route = self._lru.get(key)
+        if route is not None:
+            self.stats_counters['lru_hits'] += 1
+            return route
+
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one({"_id": key}, {"_id": 0, "created_at": 0})
+            except Exception as e:
+                self.stats_counters['errors'] += 1
+                logger.error(f"Distance cache read error: {str(e)}")
+                doc = None
+            if doc:
+                self.stats_counters['mongo_hits'] += 1
+                self._lru[key] = doc
+                return doc
+
+        self.stats_counters['misses'] += 1
+        return None
+
+    async def contains(self, key: str) -> bool:
+        """Check either tier for a key without touching the hit/miss counters"""
+        if key in self._lru:
+            return True
+        if self.collection is None:
+            return False
+        try:
+            return await self.collection.find_one({"_id": key}, {"_id": 1}) is not None
+        except Exception as e:
+            self.stats_counters['errors'] += 1
+            logger.error(f"Distance cache read error: {str(e)}")
+            return False
+
+    def set_local(self, key: str, route: Dict):
+        """Store a route in the in-process LRU only"""
+        self._lru[key] = route
+
+    async def set(self, key: str, route: Dict):
+        """Store a resolved route in both tiers"""
+        self.set_local(key, route)
+        self.stats_counters['writes'] += 1
+
+        if self.collection is None:
+            return
+        try:
+            await self.collection.update_one(
+                {"_id": key},
+                {"$set": {**route, "created_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+        except Exception as e:
+            self.stats_counters['errors'] += 1
+            logger.error(f"Distance cache write error: {str(e)}")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for monitoring"""
+        hits = self.stats_counters['lru_hits'] + self.stats_counters['mongo_hits']
+        lookups = hits + self.stats_counters['misses']
+        return {
+            **self.stats_counters,
+            'lookups': lookups,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'lru_size': len(self._lru),
+            'lru_capacity': int(self._lru.maxsize)
+        }
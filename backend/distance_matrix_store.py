@@ -0,0 +1,333 @@
+"""
+Memory-mapped distance matrix for frequent destinations
+Keeps depot routes and measured distances for the most-used delivery addresses in NumPy files
+mapped into every uvicorn worker, so a route known to one worker is known to all of them
+"""
+import os
+import json
+import time
+import fcntl
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from distance_cache import DISTANCE_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DISTANCE_MATRIX_DIR = os.environ.get(
+    'DISTANCE_MATRIX_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'distance_matrix')
+)
+# Number of destination slots; the matrix is (capacity + 1)^2 float32 (1024 -> ~4 MB)
+DISTANCE_MATRIX_CAPACITY = int(os.environ.get('DISTANCE_MATRIX_CAPACITY', '1024'))
+# How often a worker checks (off the event loop) whether another worker published new slots
+DISTANCE_MATRIX_REFRESH_SECONDS = float(os.environ.get('DISTANCE_MATRIX_REFRESH_SECONDS', '1'))
+
+# Columns of the per-slot depot table
+_DEPOT_KM, _DEPOT_SECONDS, _LAT, _LNG = range(4)
+# Columns of the per-slot usage table
+_HITS, _STORED_AT = range(2)
+
+# Addresses that missed the store, remembered per worker to decide whether they may evict a slot
+_MAX_CANDIDATES = 10000
+
+
+class DistanceMatrixStore:
+    """
+    Address -> slot index plus memory-mapped arrays shared by all processes on the host:
+
+    matrix.npy  (capacity + 1) x (capacity + 1) measured km between slots, slot 0 is the depot, NaN = unknown
+    depot.npy   (capacity + 1) x 4 depot km, depot seconds, lat, lng per slot
+    usage.npy   (capacity + 1) x 2 hits, stored-at (epoch seconds) per slot
+    index.json  normalized address -> slot
+
+    The store holds the most-used addresses: each lookup hit is counted, and once the store is full
+    a newly resolved address takes over the least-used slot once it has missed the store at least as
+    often as that slot was hit. Expired slots (older than the distance cache TTL) are not served and
+    are the first to be reused. Stop-to-stop cells hold road distances the route planner measured;
+    estimates are never stored.
+
+    Writers serialize on a file lock and fill the arrays before publishing the index entry,
+    so readers never see a slot whose distances are not written yet.
+    """
+
+    def __init__(self, directory: str = DISTANCE_MATRIX_DIR, capacity: int = DISTANCE_MATRIX_CAPACITY,
+                 ttl_seconds: float = DISTANCE_CACHE_TTL_SECONDS):
+        """
+        Args:
+            directory: Where the matrix, depot table, index and lock files live
+            capacity: Destination slots to allocate when the store is first created
+            ttl_seconds: Age after which a stored route is no longer served
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self._lock_path = os.path.join(directory, 'store.lock')
+        self._index_path = os.path.join(directory, 'index.json')
+        matrix_path = os.path.join(directory, 'matrix.npy')
+        depot_path = os.path.join(directory, 'depot.npy')
+        usage_path = os.path.join(directory, 'usage.npy')
+
+        with self._locked():
+            if not os.path.exists(self._index_path):
+                size = capacity + 1
+                matrix = open_memmap(matrix_path, mode='w+', dtype=np.float32, shape=(size, size))
+                matrix[:] = np.nan
+                matrix[0, 0] = 0.0
+                matrix.flush()
+                depot = open_memmap(depot_path, mode='w+', dtype=np.float32, shape=(size, 4))
+                depot[:] = np.nan
+                depot[0, [_DEPOT_KM, _DEPOT_SECONDS]] = 0.0
+                depot.flush()
+                del matrix, depot
+                self._write_index({})
+                logger.info(f"Created distance matrix store with {capacity} slots in {directory}")
+            if not os.path.exists(usage_path):
+                # Stores created before usage tracking start with every slot unused and expired,
+                # and lose the stop-to-stop estimates they used to hold
+                matrix = open_memmap(matrix_path, mode='r+')
+                size = matrix.shape[0]
+                depot_legs = matrix[0].copy()
+                matrix[:] = np.nan
+                matrix[0, :] = matrix[:, 0] = depot_legs
+                np.fill_diagonal(matrix, 0.0)
+                matrix.flush()
+                usage = open_memmap(usage_path, mode='w+', dtype=np.float64, shape=(size, 2))
+                usage[:] = 0.0
+                usage.flush()
+                del matrix, usage
+
+        self.matrix = open_memmap(matrix_path, mode='r+')
+        self.depot = open_memmap(depot_path, mode='r+')
+        self.usage = open_memmap(usage_path, mode='r+')
+        self.capacity = self.matrix.shape[0] - 1
+        self._slots: Dict[str, int] = {}
+        self._index_mtime = None
+        self._last_refresh = 0.0
+        self._candidates: Dict[str, int] = {}
+        self.stats_counters = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'added': 0,
+            'refreshed': 0,
+            'evicted': 0,
+            'rejected': 0,
+            'legs_added': 0
+        }
+        self._refresh_index()
+
+    @contextmanager
+    def _locked(self):
+        with open(self._lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_index(self, slots: Dict[str, int]):
+        # Write-then-rename so readers always load a complete index
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(slots, f)
+        os.replace(tmp_path, self._index_path)
+
+    def _refresh_index(self):
+        """Reload the address index if another worker has published new slots (blocking file I/O)"""
+        self._last_refresh = time.monotonic()
+        try:
+            mtime = os.stat(self._index_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._index_mtime:
+            return
+        with open(self._index_path, 'r') as f:
+            self._slots = json.load(f)
+        self._index_mtime = mtime
+
+    async def refresh(self):
+        """Pick up slots published by other workers, at most every DISTANCE_MATRIX_REFRESH_SECONDS"""
+        if time.monotonic() - self._last_refresh >= DISTANCE_MATRIX_REFRESH_SECONDS:
+            self._last_refresh = time.monotonic()
+            await asyncio.to_thread(self._refresh_index)
+
+    def _is_expired(self, slot: int) -> bool:
+        return time.time() - float(self.usage[slot, _STORED_AT]) > self.ttl_seconds
+
+    def slot(self, key: str) -> Optional[int]:
+        """Slot of a normalized address, or None if it is not in the store or has expired"""
+        slot = self._slots.get(key)
+        if slot is None or self._is_expired(slot):
+            return None
+        return slot
+
+    def depot_route(self, key: str) -> Optional[Dict]:
+        """
+        Depot route for a normalized address, in the same shape DistanceCache stores.
+        Reads the in-memory index only; call refresh() to see other workers' additions.
+
+        Returns:
+            Dict with distance_meters, duration_seconds (and lat/lng when known), or None
+        """
+        slot = self._slots.get(key)
+        if slot is not None and self._is_expired(slot):
+            self.stats_counters['expired'] += 1
+            slot = None
+        if slot is None:
+            self.stats_counters['misses'] += 1
+            if key in self._candidates or len(self._candidates) < _MAX_CANDIDATES:
+                self._candidates[key] = self._candidates.get(key, 0) + 1
+            return None
+
+        # Shared, unlocked counter: concurrent increments may be lost, which only blurs the ranking
+        self.usage[slot, _HITS] += 1
+        row = self.depot[slot]
+        self.stats_counters['hits'] += 1
+        route = {
+            'distance_meters': int(round(float(row[_DEPOT_KM]) * 1000)),
+            'duration_seconds': int(row[_DEPOT_SECONDS])
+        }
+        if not np.isnan(row[_LAT]) and not np.isnan(row[_LNG]):
+            route['lat'] = round(float(row[_LAT]), 6)
+            route['lng'] = round(float(row[_LNG]), 6)
+        return route
+
+    def wants(self, key: str) -> bool:
+        """
+        Whether add() would store this address now: it has no live slot and there is a free or expired
+        slot, or it is wanted as much as the least-used address. In-memory only, so callers can skip
+        the thread hop and file lock of add() for addresses that would be rejected.
+        """
+        slot = self._slots.get(key)
+        if slot is not None:
+            return self._is_expired(slot)
+        if len(self._slots) < self.capacity:
+            return True
+        return self._victim_slot(self._demand(key)) is not None
+
+    def _demand(self, key: str) -> int:
+        # Misses this worker has seen for the address; the counter lives on until the address is stored
+        return max(1, self._candidates.get(key, 0))
+
+    def _victim_slot(self, demand: int) -> Optional[int]:
+        """Slot to reuse once the store is full: an expired one, else the least used if it is used less than `demand`"""
+        slots = np.array(sorted(self._slots.values()), dtype=np.int64)
+        stored_at = self.usage[slots, _STORED_AT]
+        expired = slots[time.time() - stored_at > self.ttl_seconds]
+        if expired.size:
+            return int(expired[np.argmin(self.usage[expired, _STORED_AT])])
+        hits = self.usage[slots, _HITS]
+        least_used = int(np.argmin(hits))
+        if hits[least_used] > demand:
+            return None
+        return int(slots[least_used])
+
+    def add(self, key: str, route: Dict) -> Optional[int]:
+        """
+        Store a resolved depot route, refreshing the address's slot if it expired, taking a free
+        slot, or evicting the least-used address. Blocking file I/O: call it off the event loop.
+
+        Args:
+            key: Normalized address
+            route: Resolved route (distance_meters, duration_seconds, optional lat/lng)
+
+        Returns:
+            The slot, or None if the address is not used enough to displace another
+        """
+        with self._locked():
+            self._index_mtime = None
+            self._refresh_index()
+            demand = self._demand(key)
+
+            slot = self._slots.get(key)
+            if slot is not None:
+                if not self._is_expired(slot):
+                    return slot
+                self.stats_counters['refreshed'] += 1
+                hits = float(self.usage[slot, _HITS])
+            else:
+                slot = len(self._slots) + 1
+                if slot > self.capacity:
+                    slot = self._victim_slot(demand)
+                    if slot is None:
+                        self.stats_counters['rejected'] += 1
+                        return None
+                    evicted = next(address for address, used in self._slots.items() if used == slot)
+                    del self._slots[evicted]
+                    self.stats_counters['evicted'] += 1
+                hits = float(demand)
+
+            depot_km = route['distance_meters'] / 1000.0
+            lat, lng = route.get('lat'), route.get('lng')
+            self.depot[slot] = (depot_km, route.get('duration_seconds', 0),
+                                np.nan if lat is None else lat, np.nan if lng is None else lng)
+            self.usage[slot] = (hits, time.time())
+            self.matrix[slot, :] = np.nan
+            self.matrix[:, slot] = np.nan
+            self.matrix[0, slot] = self.matrix[slot, 0] = depot_km
+            self.matrix[slot, slot] = 0.0
+
+            self.matrix.flush()
+            self.depot.flush()
+            self.usage.flush()
+            self._candidates.pop(key, None)
+            if key not in self._slots:
+                self._slots[key] = slot
+                self._write_index(self._slots)
+                self._index_mtime = os.stat(self._index_path).st_mtime_ns
+                self.stats_counters['added'] += 1
+            return slot
+
+    def add_legs(self, keys: List[str], legs_km: np.ndarray) -> int:
+        """
+        Record measured road distances between stored addresses; addresses without a live slot
+        are skipped. Blocking file I/O: call it off the event loop.
+
+        Args:
+            keys: Normalized addresses
+            legs_km: len(keys) x len(keys) km from row address to column address, NaN where unknown
+
+        Returns:
+            Number of cells newly written
+        """
+        legs = np.asarray(legs_km, dtype=np.float64)
+        with self._locked():
+            self._index_mtime = None
+            self._refresh_index()
+            slots = np.array([self.slot(key) or -1 for key in keys], dtype=np.int64)
+            stored = slots >= 0
+            rows, cols = np.nonzero(stored[:, None] & stored[None, :] & ~np.isnan(legs))
+            new = np.isnan(self.matrix[slots[rows], slots[cols]])
+            rows, cols = rows[new], cols[new]
+            if rows.size:
+                self.matrix[slots[rows], slots[cols]] = legs[rows, cols]
+                self.matrix.flush()
+                self.stats_counters['legs_added'] += int(rows.size)
+            return int(rows.size)
+
+    def pair_matrix(self, keys: List[str]) -> np.ndarray:
+        """
+        Measured distances between the depot and the given addresses (in-memory index only).
+
+        Returns:
+            (n + 1) x (n + 1) km matrix aligned with [depot] + keys, NaN for unknown pairs
+        """
+        slots = np.array([0] + [self.slot(key) or -1 for key in keys], dtype=np.int64)
+        known = slots >= 0
+        result = np.full((len(slots), len(slots)), np.nan, dtype=np.float64)
+        rows = np.flatnonzero(known)
+        result[np.ix_(rows, rows)] = self.matrix[np.ix_(slots[rows], slots[rows])]
+        return result
+
+    def stats(self) -> Dict:
+        """Fill level and lookup counters for monitoring"""
+        return {
+            **self.stats_counters,
+            'slots_used': len(self._slots),
+            'capacity': self.capacity
+        }
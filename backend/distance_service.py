@@ -2,14 +2,67 @@
 Distance calculation service using Google Routes API (new API replacing Distance Matrix)
 """
 import requests
+import httpx
+import asyncio
 import os
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from distance_cache import DistanceCache, normalize_address
+from delivery_zones import ORIGIN_ZONE, ZoneIndex, get_address_matcher
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from distance_matrix_store import DistanceMatrixStore
 
 logger = logging.getLogger(__name__)
 
+ROUTES_API_URL = "https://routes.googleapis.com/directions/v2:computeRoutes"
+ROUTE_MATRIX_API_URL = "https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix"
+
+# computeRouteMatrix allows at most 50 address waypoints (origins + destinations) per request
+ROUTE_MATRIX_MAX_DESTINATIONS = 49
+# Stops per side of a stops x stops request: 25 + 25 waypoints and 625 elements, both within the limits
+ROUTE_MATRIX_MAX_STOPS = 25
+
+# Explicit timeouts so a slow Google round trip can never hang a request indefinitely
+ROUTES_CONNECT_TIMEOUT = float(os.environ.get('ROUTES_CONNECT_TIMEOUT', '3.0'))
+ROUTES_READ_TIMEOUT = float(os.environ.get('ROUTES_READ_TIMEOUT', '10.0'))
+
+# How long a fee lookup may wait on Google before answering with a flat-fee estimate
+ROUTES_LATENCY_BUDGET = float(os.environ.get('ROUTES_LATENCY_BUDGET', '2.5'))
+DEGRADED_FLAT_DELIVERY_FEE = float(os.environ.get('DEGRADED_FLAT_DELIVERY_FEE', '300.0'))
+
+# Upstream pace for pre-resolving addresses into the cache (matrix requests per minute)
+DISTANCE_WARMUP_REQUESTS_PER_MINUTE = float(os.environ.get('DISTANCE_WARMUP_REQUESTS_PER_MINUTE', '30'))
+
+
+class RoutesUnavailableError(ValueError):
+    """The Routes API could not be reached or failed on its side (network error, 429, 5xx)"""
+    pass
+
+
+def create_routes_http_client() -> httpx.AsyncClient:
+    """Keep-alive HTTP client for the Routes API. Create once per process and reuse."""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(ROUTES_READ_TIMEOUT, connect=ROUTES_CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+    )
+
+
 class DistanceService:
-    def __init__(self):
+    def __init__(self, cache: Optional[DistanceCache] = None, http_client: Optional[httpx.AsyncClient] = None,
+                 zone_index: Optional[ZoneIndex] = None, breaker: Optional[CircuitBreaker] = None,
+                 latency_budget: float = ROUTES_LATENCY_BUDGET, matrix_store: Optional[DistanceMatrixStore] = None):
+        """
+        Args:
+            cache: Shared route cache (optional). Without one every lookup hits the Routes API.
+            http_client: Shared async HTTP client (optional). Created on first async lookup if omitted.
+            zone_index: Offline neighbourhood index (optional). Known areas are answered without a network hop.
+            breaker: Circuit breaker around Routes API calls (optional)
+            latency_budget: Seconds an async lookup may wait upstream before returning an estimate
+            matrix_store: Memory-mapped matrix shared with other workers (optional). Resolved routes are added to it.
+        """
         api_key = os.environ.get('GOOGLE_MAPS_API_KEY')
         if not api_key:
             raise ValueError("GOOGLE_MAPS_API_KEY not found in environment variables")
@@ -18,6 +71,23 @@ class DistanceService:
         self.origin_address = "Washington Gardens, Kingston 20, Jamaica"
         self.base_delivery_fee = 300.0  # JMD
         self.per_mile_rate = 35.0  # JMD per mile
+        self.cache = cache
+        self.http_client = http_client
+        self.zone_index = zone_index
+        self.breaker = breaker
+        self.latency_budget = latency_budget
+        self.matrix_store = matrix_store
+        self.degraded_stats = {
+            'budget_exceeded': 0,
+            'circuit_open': 0,
+            'upstream_errors': 0
+        }
+        # Upstream lookups currently in flight, keyed by normalized address
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.inflight_stats = {
+            'upstream_requests': 0,
+            'coalesced': 0
+        }
     
     def calculate_distance(self, destination_address: str) -> Dict[str, float]:
         """
@@ -35,84 +105,19 @@ class DistanceService:
                 - duration_text: Estimated travel duration
         """
         try:
-            # Check if address is in Washington Gardens
-            if "washington gardens" in destination_address.lower():
-                return {
-                    'distance_miles': 0,
-                    'delivery_fee': 0.0,
-                    'distance_text': 'Washington Gardens (Free Delivery)',
-                    'duration_text': 'Local delivery',
-                    'is_washington_gardens': True
-                }
-            
-            # Use Google Routes API (new API)
-            url = "https://routes.googleapis.com/directions/v2:computeRoutes"
-            
-            headers = {
-                "Content-Type": "application/json",
-                "X-Goog-Api-Key": self.api_key,
-                "X-Goog-FieldMask": "routes.distanceMeters,routes.duration,routes.legs"
-            }
-            
-            body = {
-                "origin": {
-                    "address": self.origin_address
-                },
-                "destination": {
-                    "address": destination_address
-                },
-                "travelMode": "DRIVE",
-                "routingPreference": "TRAFFIC_UNAWARE"
-            }
+            # Washington Gardens and known neighbourhoods are answered locally
+            local_result = self._local_result(destination_address)
+            if local_result is not None:
+                return local_result
             
-            response = requests.post(url, headers=headers, json=body)
+            cache_key = normalize_address(destination_address)
+            route = self.cache.get_local(cache_key) if self.cache else None
+            if route is None:
+                route = self._request_route(destination_address)
+                if self.cache:
+                    self.cache.set_local(cache_key, route)
             
-            # Check response status
-            if response.status_code != 200:
-                logger.error(f"Routes API returned status {response.status_code}: {response.text}")
-                raise ValueError(f"Unable to calculate distance. Please check the address and try again.")
-            
-            data = response.json()
-            
-            # Check if routes were found
-            if not data.get('routes') or len(data['routes']) == 0:
-                raise ValueError("No route found to the specified address. Please check the address and try again.")
-            
-            route = data['routes'][0]
-            
-            # Extract distance in meters
-            distance_meters = route.get('distanceMeters', 0)
-            if distance_meters == 0:
-                raise ValueError("Unable to calculate distance for this address.")
-            
-            # Convert distance from meters to miles
-            distance_miles = distance_meters / 1609.344
-            
-            # Extract duration
-            duration_seconds = int(route.get('duration', '0s').replace('s', ''))
-            duration_minutes = duration_seconds // 60
-            duration_hours = duration_minutes // 60
-            duration_remaining_minutes = duration_minutes % 60
-            
-            if duration_hours > 0:
-                duration_text = f"{duration_hours} hour{'s' if duration_hours > 1 else ''} {duration_remaining_minutes} min{'s' if duration_remaining_minutes != 1 else ''}"
-            else:
-                duration_text = f"{duration_minutes} min{'s' if duration_minutes != 1 else ''}"
-            
-            # Format distance text
-            distance_km = distance_meters / 1000
-            distance_text = f"{distance_km:.1f} km"
-            
-            # Calculate delivery fee ($300 base + $200 per mile)
-            delivery_fee = self.base_delivery_fee + (distance_miles * self.per_mile_rate)
-            
-            return {
-                'distance_miles': round(distance_miles, 2),
-                'delivery_fee': round(delivery_fee, 2),
-                'distance_text': distance_text,
-                'duration_text': duration_text,
-                'is_washington_gardens': False
-            }
+            return self._build_result(route)
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Routes API request error: {str(e)}")
@@ -121,6 +126,327 @@ class DistanceService:
             logger.error(f"Distance calculation error: {str(e)}")
             raise ValueError(str(e))
     
+    async def calculate_distance_async(self, destination_address: str) -> Dict[str, float]:
+        """
+        Non-blocking variant of calculate_distance for use inside async endpoints.
+        Consults both cache tiers (LRU and MongoDB) before spending Routes API quota,
+        and goes upstream over the shared keep-alive client.
+        
+        If the Routes API is failing, the circuit is open or the latency budget runs out,
+        a flat-fee answer flagged with is_estimate is returned instead of an error.
+        
+        Args:
+            destination_address: Customer delivery address
+            
+        Returns:
+            Dict with the same keys as calculate_distance
+        """
+        local_result = self._local_result(destination_address)
+        if local_result is not None:
+            return local_result
+        
+        cache_key = normalize_address(destination_address)
+        route = None
+        if self.matrix_store:
+            await self.matrix_store.refresh()
+            route = self.matrix_store.depot_route(cache_key)
+        if route is not None:
+            return self._build_result(route)
+        
+        route = await self.cache.get(cache_key) if self.cache else None
+        if route is None:
+            try:
+                # The upstream lookup keeps running after the budget expires and will still fill the cache
+                route = await asyncio.wait_for(
+                    self._resolve_route(cache_key, destination_address),
+                    timeout=self.latency_budget
+                )
+            except asyncio.TimeoutError:
+                self.degraded_stats['budget_exceeded'] += 1
+                logger.warning(f"Routes API exceeded {self.latency_budget}s budget, returning estimate")
+                return self._estimated_result()
+            except CircuitOpenError:
+                self.degraded_stats['circuit_open'] += 1
+                return self._estimated_result()
+            except RoutesUnavailableError:
+                self.degraded_stats['upstream_errors'] += 1
+                return self._estimated_result()
+        
+        await self._remember_route(cache_key, route)
+        return self._build_result(route)
+    
+    async def _resolve_route(self, cache_key: str, destination_address: str) -> Dict[str, int]:
+        """
+        Fetch a route upstream, sharing one request between all concurrent callers
+        asking for the same normalized address.
+        """
+        future = self._inflight.get(cache_key)
+        if future is not None:
+            self.inflight_stats['coalesced'] += 1
+        else:
+            future = asyncio.ensure_future(self._fetch_and_cache_route(cache_key, destination_address))
+            self._register_inflight(cache_key, future)
+        
+        # Shield so one caller disconnecting does not cancel the lookup for everyone else
+        return await asyncio.shield(future)
+    
+    async def _fetch_and_cache_route(self, cache_key: str, destination_address: str) -> Dict[str, int]:
+        route = await self._call_upstream(self._request_route_async(destination_address))
+        if self.cache:
+            await self.cache.set(cache_key, route)
+        return route
+    
+    async def _call_upstream(self, request):
+        """
+        Run a Routes API coroutine through the circuit breaker.
+        Only upstream faults count as failures; a bad address means Google is healthy.
+        """
+        if self.breaker and not self.breaker.allow_request():
+            request.close()
+            raise CircuitOpenError("Routes API circuit is open")
+        
+        self.inflight_stats['upstream_requests'] += 1
+        healthy = False
+        try:
+            result = await request
+            healthy = True
+            return result
+        except RoutesUnavailableError:
+            raise
+        except ValueError:
+            healthy = True
+            raise
+        finally:
+            if self.breaker:
+                if healthy:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+    
+    async def _remember_route(self, cache_key: str, route: Dict):
+        """Give a resolved address a slot in the shared matrix store, if it has no live one yet and would be admitted"""
+        if self.matrix_store is None or not self.matrix_store.wants(cache_key):
+            return
+        try:
+            await asyncio.to_thread(self.matrix_store.add, cache_key, route)
+        except Exception as e:
+            logger.error(f"Distance matrix store write error: {str(e)}")
+    
+    def _register_inflight(self, cache_key: str, future: asyncio.Future):
+        self._inflight[cache_key] = future
+        
+        def _done(done_future: asyncio.Future):
+            self._inflight.pop(cache_key, None)
+            # Mark the error as retrieved even if every waiter has gone away
+            if not done_future.cancelled():
+                done_future.exception()
+        
+        future.add_done_callback(_done)
+    
+    def singleflight_stats(self) -> Dict:
+        """Upstream vs. coalesced lookup counters for monitoring"""
+        return {**self.inflight_stats, 'in_flight': len(self._inflight)}
+    
+    def degraded_mode_stats(self) -> Dict:
+        """Circuit breaker state and how often estimates were served instead of real routes"""
+        return {
+            **self.degraded_stats,
+            'latency_budget_seconds': self.latency_budget,
+            'breaker': self.breaker.stats() if self.breaker else None
+        }
+    
+    def _local_result(self, destination_address: str) -> Optional[Dict[str, float]]:
+        """Answer from Washington Gardens / the zone index without any network hop, or None"""
+        matcher = self.zone_index.matcher if self.zone_index else get_address_matcher()
+        zone_name = matcher.classify(destination_address)
+        if zone_name == ORIGIN_ZONE:
+            return self._washington_gardens_result()
+        
+        if zone_name is None or self.zone_index is None:
+            return None
+        # One banded distance per neighbourhood, so the fee is an estimate
+        return {**self._build_result(self.zone_index.route_for_zone(zone_name)), 'is_estimate': True}
+    
+    async def lookup_route(self, destination_address: str) -> Optional[Dict]:
+        """
+        Route data (distance, duration and location when known) from the zone index
+        or the cache only. Never goes upstream; returns None if the address is unknown.
+        """
+        matcher = self.zone_index.matcher if self.zone_index else get_address_matcher()
+        zone_name = matcher.classify(destination_address)
+        if zone_name is not None and (zone_name == ORIGIN_ZONE or self.zone_index is not None):
+            if self.zone_index is not None and zone_name in self.zone_index.zones:
+                return self.zone_index.route_for_zone(zone_name)
+            return {'distance_meters': 0, 'duration_seconds': 0, 'zone': ORIGIN_ZONE}
+        
+        cache_key = normalize_address(destination_address)
+        route = None
+        if self.matrix_store:
+            await self.matrix_store.refresh()
+            route = self.matrix_store.depot_route(cache_key)
+        if route is not None or self.cache is None:
+            return route
+        return await self.cache.get(cache_key)
+    
+    def origin_location(self) -> Optional[Tuple[float, float]]:
+        """Latitude/longitude of the depot, if the zone table knows it"""
+        if self.zone_index is None:
+            return None
+        zone = self.zone_index.zones.get(ORIGIN_ZONE, {})
+        if 'lat' in zone and 'lng' in zone:
+            return zone['lat'], zone['lng']
+        return None
+    
+    def _washington_gardens_result(self) -> Dict[str, float]:
+        return {
+            'distance_miles': 0,
+            'delivery_fee': 0.0,
+            'distance_text': 'Washington Gardens (Free Delivery)',
+            'duration_text': 'Local delivery',
+            'is_washington_gardens': True,
+            'zone': 'Washington Gardens'
+        }
+    
+    def _estimated_result(self) -> Dict[str, float]:
+        """Flat-fee answer used when the Routes API is unavailable or too slow"""
+        return {
+            'distance_miles': 0,
+            'delivery_fee': DEGRADED_FLAT_DELIVERY_FEE,
+            'distance_text': 'Distance unavailable',
+            'duration_text': 'Estimated',
+            'is_washington_gardens': False,
+            'zone': None,
+            'is_estimate': True
+        }
+    
+    def _route_request(self, destination_address: str) -> Tuple[Dict[str, str], Dict]:
+        """Headers and body for a computeRoutes call"""
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": self.api_key,
+            "X-Goog-FieldMask": "routes.distanceMeters,routes.duration,routes.legs"
+        }
+        
+        body = {
+            "origin": {
+                "address": self.origin_address
+            },
+            "destination": {
+                "address": destination_address
+            },
+            "travelMode": "DRIVE",
+            "routingPreference": "TRAFFIC_UNAWARE"
+        }
+        return headers, body
+    
+    def _parse_route_response(self, status_code: int, text: str, data_loader) -> Dict[str, int]:
+        """
+        Validate a computeRoutes response.
+        
+        Returns:
+            Dict with distance_meters and duration_seconds (the cacheable part of a result)
+        """
+        # Check response status
+        if status_code == 429 or status_code >= 500:
+            logger.error(f"Routes API unavailable, status {status_code}: {text}")
+            raise RoutesUnavailableError(f"Distance calculation failed: Unable to reach mapping service")
+        if status_code != 200:
+            logger.error(f"Routes API returned status {status_code}: {text}")
+            raise ValueError(f"Unable to calculate distance. Please check the address and try again.")
+        
+        data = data_loader()
+        
+        # Check if routes were found
+        if not data.get('routes') or len(data['routes']) == 0:
+            raise ValueError("No route found to the specified address. Please check the address and try again.")
+        
+        route = data['routes'][0]
+        
+        # Extract distance in meters
+        distance_meters = route.get('distanceMeters', 0)
+        if distance_meters == 0:
+            raise ValueError("Unable to calculate distance for this address.")
+        
+        result = {
+            'distance_meters': distance_meters,
+            'duration_seconds': int(route.get('duration', '0s').replace('s', ''))
+        }
+        
+        # Keep the geocoded destination so route planning can estimate stop-to-stop distances
+        legs = route.get('legs') or []
+        end_location = legs[-1].get('endLocation', {}).get('latLng', {}) if legs else {}
+        if 'latitude' in end_location and 'longitude' in end_location:
+            result['lat'] = end_location['latitude']
+            result['lng'] = end_location['longitude']
+        
+        return result
+    
+    def _request_route(self, destination_address: str) -> Dict[str, int]:
+        """Blocking Routes API call (used by the sync calculate_distance path)"""
+        headers, body = self._route_request(destination_address)
+        response = requests.post(
+            ROUTES_API_URL,
+            headers=headers,
+            json=body,
+            timeout=(ROUTES_CONNECT_TIMEOUT, ROUTES_READ_TIMEOUT)
+        )
+        return self._parse_route_response(response.status_code, response.text, response.json)
+    
+    async def _request_route_async(self, destination_address: str) -> Dict[str, int]:
+        """Routes API call over the shared keep-alive client"""
+        headers, body = self._route_request(destination_address)
+        try:
+            response = await self._get_http_client().post(ROUTES_API_URL, headers=headers, json=body)
+        except httpx.HTTPError as e:
+            logger.error(f"Routes API request error: {str(e)}")
+            raise RoutesUnavailableError(f"Distance calculation failed: Unable to reach mapping service")
+        return self._parse_route_response(response.status_code, response.text, response.json)
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        if self.http_client is None:
+            self.http_client = create_routes_http_client()
+        return self.http_client
+    
+    async def aclose(self):
+        """Close the shared HTTP client (call on application shutdown)"""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+    
+    def _build_result(self, route: Dict[str, int]) -> Dict[str, float]:
+        """Turn a (possibly cached) route into the fee response"""
+        distance_meters = route['distance_meters']
+        
+        # Convert distance from meters to miles
+        distance_miles = distance_meters / 1609.344
+        
+        # Extract duration
+        duration_seconds = route['duration_seconds']
+        duration_minutes = duration_seconds // 60
+        duration_hours = duration_minutes // 60
+        duration_remaining_minutes = duration_minutes % 60
+        
+        if duration_hours > 0:
+            duration_text = f"{duration_hours} hour{'s' if duration_hours > 1 else ''} {duration_remaining_minutes} min{'s' if duration_remaining_minutes != 1 else ''}"
+        else:
+            duration_text = f"{duration_minutes} min{'s' if duration_minutes != 1 else ''}"
+        
+        # Format distance text
+        distance_km = distance_meters / 1000
+        distance_text = f"{distance_km:.1f} km"
+        
+        # Calculate delivery fee ($300 base + $200 per mile)
+        delivery_fee = self.base_delivery_fee + (distance_miles * self.per_mile_rate)
+        
+        return {
+            'distance_miles': round(distance_miles, 2),
+            'delivery_fee': round(delivery_fee, 2),
+            'distance_text': distance_text,
+            'duration_text': duration_text,
+            'is_washington_gardens': False,
+            'zone': route.get('zone')
+        }
+    
     def calculate_delivery_fee_for_order(self, destination_address: str, bags: int) -> Dict[str, float]:
         """
         Calculate delivery fee for an order, applying free delivery for 20+ bags.
@@ -133,10 +459,302 @@ class DistanceService:
             Dict containing distance and fee information, with fee set to 0 for 20+ bags
         """
         result = self.calculate_distance(destination_address)
-        
+        return self._apply_bag_rules(result, bags)
+    
+    def _apply_bag_rules(self, result: Dict[str, float], bags: int) -> Dict[str, float]:
         # Free delivery for 20+ bags anywhere in Kingston
         if bags >= 20:
             result['delivery_fee'] = 0.0
             result['free_delivery_reason'] = '20+ bags qualify for free delivery'
         
         return result
+    
+    async def calculate_delivery_fee_for_order_async(self, destination_address: str, bags: int) -> Dict[str, float]:
+        """Async (cached) variant of calculate_delivery_fee_for_order"""
+        result = await self.calculate_distance_async(destination_address)
+        return self._apply_bag_rules(result, bags)
+    
+    async def calculate_distances_batch(self, destination_addresses: List[str]) -> List[Dict]:
+        """
+        Resolve many destinations at once. Known zones and cached routes are served locally; the rest
+        go upstream in a single computeRouteMatrix request (one per 49 destinations).
+        
+        Args:
+            destination_addresses: Customer delivery addresses
+            
+        Returns:
+            List aligned with destination_addresses. Each item has the same keys as
+            calculate_distance, or a single 'error' key if that address could not be routed.
+        """
+        routes: Dict[str, Dict] = {}
+        errors: Dict[str, str] = {}
+        misses: Dict[str, str] = {}  # cache key -> first address seen for it
+        joined: Dict[str, asyncio.Future] = {}  # lookups another request already has in flight
+        estimated = set()  # keys answered with a flat-fee estimate because Google is unavailable
+        
+        local_results: Dict[int, Dict] = {}
+        if self.matrix_store:
+            await self.matrix_store.refresh()
+        for position, address in enumerate(destination_addresses):
+            local_result = self._local_result(address)
+            if local_result is not None:
+                local_results[position] = local_result
+                continue
+            key = normalize_address(address)
+            if key in routes or key in misses or key in joined:
+                continue
+            route = self.matrix_store.depot_route(key) if self.matrix_store else None
+            if route is None and self.cache:
+                route = await self.cache.get(key)
+            if route is not None:
+                routes[key] = route
+            elif key in self._inflight:
+                self.inflight_stats['coalesced'] += 1
+                joined[key] = self._inflight[key]
+            else:
+                misses[key] = address
+        
+        # Publish our misses as in-flight so single lookups for the same addresses wait for the matrix
+        loop = asyncio.get_running_loop()
+        pending = {key: loop.create_future() for key in misses}
+        for key, future in pending.items():
+            self._register_inflight(key, future)
+        
+        miss_keys = list(misses)
+        try:
+            for start in range(0, len(miss_keys), ROUTE_MATRIX_MAX_DESTINATIONS):
+                chunk = miss_keys[start:start + ROUTE_MATRIX_MAX_DESTINATIONS]
+                try:
+                    chunk_routes = await self._call_upstream(
+                        self._request_route_matrix_async([misses[key] for key in chunk])
+                    )
+                except (CircuitOpenError, RoutesUnavailableError) as e:
+                    self.degraded_stats['circuit_open' if isinstance(e, CircuitOpenError) else 'upstream_errors'] += 1
+                    for key in chunk:
+                        estimated.add(key)
+                        pending[key].set_exception(e)
+                    continue
+                except ValueError as e:
+                    for key in chunk:
+                        errors[key] = str(e)
+                        pending[key].set_exception(ValueError(str(e)))
+                    continue
+                for index, key in enumerate(chunk):
+                    route = chunk_routes.get(index)
+                    if route is None:
+                        errors[key] = "No route found to the specified address. Please check the address and try again."
+                        pending[key].set_exception(ValueError(errors[key]))
+                        continue
+                    routes[key] = route
+                    pending[key].set_result(route)
+                    if self.cache:
+                        await self.cache.set(key, route)
+        finally:
+            for future in pending.values():
+                if not future.done():
+                    future.cancel()
+        
+        for key, future in joined.items():
+            try:
+                routes[key] = await asyncio.shield(future)
+            except (CircuitOpenError, RoutesUnavailableError):
+                estimated.add(key)
+            except Exception as e:
+                errors[key] = str(e)
+        
+        for key, route in routes.items():
+            await self._remember_route(key, route)
+        
+        results = []
+        for position, address in enumerate(destination_addresses):
+            if position in local_results:
+                results.append(local_results[position])
+                continue
+            key = normalize_address(address)
+            if key in routes:
+                results.append(self._build_result(routes[key]))
+            elif key in estimated:
+                results.append(self._estimated_result())
+            else:
+                results.append({'error': errors.get(key, "Unable to calculate distance for this address.")})
+        return results
+    
+    async def calculate_delivery_fees_for_orders(self, orders: List[Tuple[str, int]]) -> List[Dict]:
+        """
+        Batch variant of calculate_delivery_fee_for_order.
+        
+        Args:
+            orders: (destination_address, bags) pairs
+            
+        Returns:
+            List aligned with orders, see calculate_distances_batch
+        """
+        results = await self.calculate_distances_batch([address for address, _ in orders])
+        return [
+            result if 'error' in result else self._apply_bag_rules(result, bags)
+            for result, (_, bags) in zip(results, orders)
+        ]
+    
+    async def measure_stop_legs(self, destination_addresses: List[str],
+                                known_km: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Road distances between delivery stops, for route planning.
+        Pairs not already known (or held by the matrix store) go upstream as stops x stops
+        computeRouteMatrix requests (25 x 25 stops each); blocks whose pairs are all known are
+        skipped. Measured pairs between stored addresses are written back to the matrix store.
+        
+        Args:
+            destination_addresses: Stop addresses
+            known_km: n x n km already known (NaN where unknown); read from the matrix store if omitted
+            
+        Returns:
+            n x n km from row stop to column stop, NaN where Google had no route or could not be reached
+        """
+        n = len(destination_addresses)
+        keys = [normalize_address(address) for address in destination_addresses]
+        if known_km is not None:
+            legs = np.array(known_km, dtype=np.float64)
+        elif self.matrix_store:
+            await self.matrix_store.refresh()
+            legs = self.matrix_store.pair_matrix(keys)[1:, 1:]
+        else:
+            legs = np.full((n, n), np.nan, dtype=np.float64)
+        # Stops at the same address are no distance apart
+        key_array = np.array(keys, dtype=object)
+        legs[key_array[:, None] == key_array[None, :]] = 0.0
+        measured = unavailable = False
+        
+        for origin_start in range(0, n, ROUTE_MATRIX_MAX_STOPS):
+            origin_end = min(n, origin_start + ROUTE_MATRIX_MAX_STOPS)
+            for destination_start in range(0, n, ROUTE_MATRIX_MAX_STOPS):
+                destination_end = min(n, destination_start + ROUTE_MATRIX_MAX_STOPS)
+                block = legs[origin_start:origin_end, destination_start:destination_end]
+                if not np.isnan(block).any():
+                    continue
+                try:
+                    pairs = await self._call_upstream(self._request_pair_matrix_async(
+                        destination_addresses[origin_start:origin_end],
+                        destination_addresses[destination_start:destination_end]
+                    ))
+                except (CircuitOpenError, RoutesUnavailableError) as e:
+                    logger.warning(f"Stopped measuring stop-to-stop legs: {str(e)}")
+                    unavailable = True
+                    break
+                except ValueError as e:
+                    logger.warning(f"Could not measure a block of stop-to-stop legs: {str(e)}")
+                    continue
+                for (origin, destination), route in pairs.items():
+                    if np.isnan(block[origin, destination]):
+                        block[origin, destination] = route['distance_meters'] / 1000.0
+                        measured = True
+            if unavailable:
+                break
+        
+        if measured and self.matrix_store:
+            try:
+                await asyncio.to_thread(self.matrix_store.add_legs, keys, legs)
+            except Exception as e:
+                logger.error(f"Distance matrix store write error: {str(e)}")
+        return legs
+    
+    async def _request_route_matrix_async(self, destination_addresses: List[str]) -> Dict[int, Dict[str, int]]:
+        """
+        One computeRouteMatrix call from Washington Gardens to every destination.
+        
+        Returns:
+            Dict mapping destination index to distance_meters/duration_seconds.
+            Destinations without a route are left out.
+        """
+        pairs = await self._request_pair_matrix_async([self.origin_address], destination_addresses)
+        return {destination: route for (_, destination), route in pairs.items()}
+    
+    async def _request_pair_matrix_async(self, origin_addresses: List[str],
+                                         destination_addresses: List[str]) -> Dict[Tuple[int, int], Dict[str, int]]:
+        """
+        One computeRouteMatrix call from every origin to every destination.
+        
+        Returns:
+            Dict mapping (origin index, destination index) to distance_meters/duration_seconds.
+            Pairs without a route are left out.
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": self.api_key,
+            "X-Goog-FieldMask": "originIndex,destinationIndex,distanceMeters,duration,condition,status"
+        }
+        
+        body = {
+            "origins": [{"waypoint": {"address": address}} for address in origin_addresses],
+            "destinations": [{"waypoint": {"address": address}} for address in destination_addresses],
+            "travelMode": "DRIVE",
+            "routingPreference": "TRAFFIC_UNAWARE"
+        }
+        
+        try:
+            response = await self._get_http_client().post(ROUTE_MATRIX_API_URL, headers=headers, json=body)
+        except httpx.HTTPError as e:
+            logger.error(f"Route matrix request error: {str(e)}")
+            raise RoutesUnavailableError(f"Distance calculation failed: Unable to reach mapping service")
+        
+        if response.status_code == 429 or response.status_code >= 500:
+            logger.error(f"Route matrix API unavailable, status {response.status_code}: {response.text}")
+            raise RoutesUnavailableError(f"Distance calculation failed: Unable to reach mapping service")
+        if response.status_code != 200:
+            logger.error(f"Route matrix API returned status {response.status_code}: {response.text}")
+            raise ValueError(f"Unable to calculate distances. Please check the addresses and try again.")
+        
+        routes = {}
+        for element in response.json():
+            # Zero-valued fields (e.g. originIndex/destinationIndex 0) are omitted from the JSON response
+            if element.get('condition') != 'ROUTE_EXISTS' or not element.get('distanceMeters'):
+                continue
+            routes[(element.get('originIndex', 0), element.get('destinationIndex', 0))] = {
+                'distance_meters': element['distanceMeters'],
+                'duration_seconds': int(element.get('duration', '0s').replace('s', ''))
+            }
+        return routes
+    
+    async def warm_up(self, addresses: List[str],
+                      requests_per_minute: float = DISTANCE_WARMUP_REQUESTS_PER_MINUTE) -> Dict[str, int]:
+        """
+        Pre-resolve addresses into the route cache at a rate-limited pace.
+        Addresses already cached or answered by the zone index cost nothing.
+        
+        Args:
+            addresses: Delivery addresses to resolve (duplicates and blanks are fine)
+            requests_per_minute: Maximum upstream matrix requests per minute
+            
+        Returns:
+            Dict with counts of unique, already cached and newly resolved addresses
+        """
+        unique: Dict[str, str] = {}
+        for address in addresses:
+            if not address or not str(address).strip():
+                continue
+            address = str(address)
+            if self._local_result(address) is not None:
+                continue
+            unique.setdefault(normalize_address(address), address)
+        
+        to_resolve = []
+        for key, address in unique.items():
+            if self.cache and await self.cache.contains(key):
+                continue
+            to_resolve.append(address)
+        
+        interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0
+        resolved = 0
+        for start in range(0, len(to_resolve), ROUTE_MATRIX_MAX_DESTINATIONS):
+            if self.breaker and self.breaker.state == CircuitBreaker.OPEN:
+                logger.warning("Routes API circuit is open, stopping distance cache warm-up")
+                break
+            if start > 0:
+                await asyncio.sleep(interval)
+            results = await self.calculate_distances_batch(to_resolve[start:start + ROUTE_MATRIX_MAX_DESTINATIONS])
+            resolved += sum(1 for result in results if 'error' not in result and not result.get('is_estimate'))
+        
+        return {
+            'unique_addresses': len(unique),
+            'already_cached': len(unique) - len(to_resolve),
+            'resolved': resolved
+        }
@@ -0,0 +1,299 @@
+"""
+Offline stand-in for gspread used for load testing
+Implements the subset of Client/Spreadsheet/Worksheet the app uses on top of SQLite,
+with injected latency and 429 errors, so Sheets-backed paths can be benchmarked without network or quota
+
+Enable with GOOGLE_SHEETS_BACKEND=fake. Seed a sheet with:
+    python fake_sheets.py --leads 10000 --url <GOOGLE_SHEETS_URL>
+"""
+import os
+import re
+import json
+import time
+import random
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from gspread.exceptions import APIError
+
+from google_sheets_integration import LEAD_SHEET_HEADERS, call_with_backoff
+
+logger = logging.getLogger(__name__)
+
+# SQLite file shared by every worker (":memory:" keeps the data per process)
+FAKE_SHEETS_DB = os.environ.get('GOOGLE_SHEETS_FAKE_DB', ':memory:')
+FAKE_SHEETS_LATENCY_MS = float(os.environ.get('GOOGLE_SHEETS_FAKE_LATENCY_MS', '0'))
+FAKE_SHEETS_429_RATE = float(os.environ.get('GOOGLE_SHEETS_FAKE_429_RATE', '0'))
+
+A1_RANGE = re.compile(r'^([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?$')
+
+
+def _column_number(letters: str) -> int:
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - ord('A') + 1
+    return number
+
+
+def _parse_range(a1: str):
+    """'B:B' / 'A2:A' / 'F7' -> (first row, last row or None, first col, last col), 1-based"""
+    match = A1_RANGE.match(a1.split('!')[-1].upper())
+    if not match:
+        raise ValueError(f"Unsupported range: {a1}")
+    start_col, start_row, end_col, end_row = match.groups()
+    first_row = int(start_row) if start_row else 1
+    if end_col is None:
+        last_row = first_row if start_row else None
+        end_col = start_col
+    else:
+        last_row = int(end_row) if end_row else None
+    return first_row, last_row, _column_number(start_col), _column_number(end_col)
+
+
+def _numericise(value: Any) -> Any:
+    """Same idea as gspread's numericise: '12' -> 12, '1.5' -> 1.5, anything else unchanged"""
+    if not isinstance(value, str) or value.strip() == "":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class _FakeResponse:
+    """Just enough of a requests.Response for gspread's APIError"""
+
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        self.text = message
+        self._payload = {"error": {"code": status_code, "message": message, "status": "RESOURCE_EXHAUSTED"}}
+
+    def json(self) -> Dict:
+        return self._payload
+
+
+class FakeSheetsBackend:
+    """SQLite storage plus the latency/429 injection applied to every simulated API call"""
+
+    def __init__(self, path: str = FAKE_SHEETS_DB, latency_ms: float = FAKE_SHEETS_LATENCY_MS,
+                 rate_429: float = FAKE_SHEETS_429_RATE):
+        """
+        Args:
+            path: SQLite database file, or ":memory:"
+            latency_ms: Delay added to every simulated API call
+            rate_429: Probability (0-1) that a simulated API call fails with 429
+        """
+        self.latency_ms = latency_ms
+        self.rate_429 = rate_429
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA busy_timeout = 5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS worksheets (spreadsheet TEXT, id INTEGER, title TEXT, PRIMARY KEY (spreadsheet, id))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rows (spreadsheet TEXT, worksheet_id INTEGER, row INTEGER, data TEXT, "
+            "PRIMARY KEY (spreadsheet, worksheet_id, row))"
+        )
+        self.stats_counters = {'calls': 0, 'injected_429': 0}
+
+    def api_call(self, operation):
+        """Run a storage operation as one simulated Sheets API request"""
+        def _attempt():
+            self.stats_counters['calls'] += 1
+            if self.latency_ms:
+                time.sleep(self.latency_ms / 1000.0)
+            if self.rate_429 and random.random() < self.rate_429:
+                self.stats_counters['injected_429'] += 1
+                raise APIError(_FakeResponse(429, "Quota exceeded (injected by fake_sheets)"))
+            with self._lock:
+                return operation()
+        # Same limiter and backoff path as real requests
+        return call_with_backoff(_attempt)
+
+    def query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        return self._db.execute(sql, params).fetchall()
+
+    def execute_many(self, statements: List[tuple]):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in statements:
+                self._db.execute(sql, params)
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+
+class FakeWorksheet:
+    def __init__(self, backend: FakeSheetsBackend, spreadsheet_id: str, worksheet_id: int, title: str):
+        self._backend = backend
+        self.spreadsheet_id = spreadsheet_id
+        self.id = worksheet_id
+        self.title = title
+
+    def _rows(self) -> Dict[int, List]:
+        return {
+            row: json.loads(data)
+            for row, data in self._backend.query(
+                "SELECT row, data FROM rows WHERE spreadsheet = ? AND worksheet_id = ?", (self.spreadsheet_id, self.id)
+            )
+        }
+
+    def _append(self, rows: List[List]):
+        last = self._backend.query(
+            "SELECT COALESCE(MAX(row), 0) FROM rows WHERE spreadsheet = ? AND worksheet_id = ?", (self.spreadsheet_id, self.id)
+        )[0][0]
+        self._backend.execute_many([
+            ("INSERT INTO rows VALUES (?, ?, ?, ?)",
+             (self.spreadsheet_id, self.id, last + offset, json.dumps([str(value) for value in row])))
+            for offset, row in enumerate(rows, start=1)
+        ])
+
+    def append_row(self, values: List, **kwargs):
+        self._backend.api_call(lambda: self._append([values]))
+
+    def append_rows(self, values: List[List], **kwargs):
+        self._backend.api_call(lambda: self._append(values))
+
+    def get_all_records(self, **kwargs) -> List[Dict]:
+        def _records():
+            rows = self._rows()
+            if not rows:
+                return []
+            headers = rows.get(1, [])
+            records = []
+            for row_number in range(2, max(rows) + 1):
+                values = rows.get(row_number, [])
+                records.append({
+                    header: _numericise(values[index]) if index < len(values) else ""
+                    for index, header in enumerate(headers)
+                })
+            return records
+        return self._backend.api_call(_records)
+
+    def batch_get(self, ranges: List[str], **kwargs) -> List[List[List]]:
+        def _get():
+            rows = self._rows()
+            last_row = max(rows) if rows else 0
+            results = []
+            for a1 in ranges:
+                first_row, range_last_row, first_col, last_col = _parse_range(a1)
+                values = []
+                for row_number in range(first_row, min(range_last_row or last_row, last_row) + 1):
+                    row = rows.get(row_number, [])
+                    cells = [row[col - 1] if col - 1 < len(row) else "" for col in range(first_col, last_col + 1)]
+                    while cells and cells[-1] == "":
+                        cells.pop()
+                    values.append(cells)
+                while values and not values[-1]:
+                    values.pop()
+                results.append(values)
+            return results
+        return self._backend.api_call(_get)
+
+    def batch_update(self, data: List[Dict], **kwargs):
+        def _update():
+            rows = self._rows()
+            changed = set()
+            for item in data:
+                first_row, _, first_col, _ = _parse_range(item['range'])
+                for row_offset, values in enumerate(item['values']):
+                    row = rows.setdefault(first_row + row_offset, [])
+                    for col_offset, value in enumerate(values):
+                        col = first_col + col_offset
+                        row.extend([""] * (col - len(row)))
+                        row[col - 1] = str(value)
+                    changed.add(first_row + row_offset)
+            self._backend.execute_many([
+                ("INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?)",
+                 (self.spreadsheet_id, self.id, row_number, json.dumps(rows[row_number])))
+                for row_number in changed
+            ])
+        self._backend.api_call(_update)
+
+
+class FakeSpreadsheet:
+    def __init__(self, backend: FakeSheetsBackend, url: str):
+        self._backend = backend
+        self.id = url
+        self.url = url
+        self.title = "Fake spreadsheet"
+
+    def worksheets(self) -> List[FakeWorksheet]:
+        def _list():
+            found = self._backend.query("SELECT id, title FROM worksheets WHERE spreadsheet = ? ORDER BY id", (self.id,))
+            if not found:
+                # New spreadsheets start with one empty "Sheet1" like in Google Sheets
+                self._backend.execute_many([("INSERT OR IGNORE INTO worksheets VALUES (?, 0, 'Sheet1')", (self.id,))])
+                found = [(0, 'Sheet1')]
+            return [FakeWorksheet(self._backend, self.id, worksheet_id, title) for worksheet_id, title in found]
+        return self._backend.api_call(_list)
+
+    def add_worksheet(self, title: str, rows: Any = None, cols: Any = None, **kwargs) -> FakeWorksheet:
+        def _add():
+            next_id = self._backend.query(
+                "SELECT COALESCE(MAX(id), -1) + 1 FROM worksheets WHERE spreadsheet = ?", (self.id,)
+            )[0][0]
+            self._backend.execute_many([("INSERT INTO worksheets VALUES (?, ?, ?)", (self.id, next_id, title))])
+            return FakeWorksheet(self._backend, self.id, next_id, title)
+        return self._backend.api_call(_add)
+
+
+class FakeSheetsClient:
+    """Drop-in for the authorized gspread.Client returned by get_sheets_client"""
+
+    def __init__(self, backend: Optional[FakeSheetsBackend] = None):
+        self.backend = backend or FakeSheetsBackend()
+
+    def open_by_url(self, url: str) -> FakeSpreadsheet:
+        return self.backend.api_call(lambda: FakeSpreadsheet(self.backend, url))
+
+
+_fake_client: Optional[FakeSheetsClient] = None
+_fake_client_lock = threading.Lock()
+
+
+def get_fake_client() -> FakeSheetsClient:
+    """Process-wide fake client, created on first use"""
+    global _fake_client
+    with _fake_client_lock:
+        if _fake_client is None:
+            _fake_client = FakeSheetsClient()
+            logger.warning(
+                f"Using fake Google Sheets backend ({FAKE_SHEETS_DB}, {FAKE_SHEETS_LATENCY_MS}ms latency, "
+                f"{FAKE_SHEETS_429_RATE:.0%} 429 rate)"
+            )
+        return _fake_client
+
+
+def seed_leads(sheet_url: str, count: int, worksheet_name: str = "Sheet1"):
+    """Fill a fake worksheet with a header row and `count` generated leads"""
+    spreadsheet = get_fake_client().open_by_url(sheet_url)
+    worksheet = next((ws for ws in spreadsheet.worksheets() if ws.title == worksheet_name), None)
+    worksheet = worksheet or spreadsheet.add_worksheet(worksheet_name)
+    areas = ["Washington Gardens", "Duhaney Park", "Patrick City", "Pembrook Hall", "Half Way Tree"]
+    types = ["bar", "restaurant", "shop", "event venue", "caterer", "hotel/motel"]
+    rows = [LEAD_SHEET_HEADERS] + [
+        [f"Business {number}", f"876-{number // 10000 % 1000:03d}-{number % 10000:04d}", f"{number} Main Road",
+         types[number % len(types)], areas[number % len(areas)], "New", "", "", ""]
+        for number in range(1, count + 1)
+    ]
+    worksheet.append_rows(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Seed the fake Google Sheets backend (set GOOGLE_SHEETS_FAKE_DB to a file)")
+    parser.add_argument("--url", default=os.environ.get('GOOGLE_SHEETS_URL', 'fake://sheet'))
+    parser.add_argument("--leads", type=int, default=1000)
+    args = parser.parse_args()
+    seed_leads(args.url, args.leads)
+    print(f"Seeded {args.leads} leads into {args.url} ({FAKE_SHEETS_DB})")
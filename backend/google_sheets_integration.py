@@ -4,13 +4,311 @@ Reads lead data from Google Sheets for sales agent outbound calls
 """
 
 import gspread
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
 from google.oauth2.service_account import Credentials
 import logging
 import os
-from typing import List, Dict, Optional
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+import functools
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Dict, Optional, Tuple
+
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Write-behind append queue: a worksheet buffer is flushed when it reaches the batch size
+# or every flush interval, whichever comes first
+SHEETS_APPEND_BATCH_SIZE = int(os.environ.get('GOOGLE_SHEETS_APPEND_BATCH_SIZE', '50'))
+SHEETS_APPEND_FLUSH_SECONDS = float(os.environ.get('GOOGLE_SHEETS_APPEND_FLUSH_SECONDS', '2.0'))
+SHEETS_APPEND_MAX_RETRIES = int(os.environ.get('GOOGLE_SHEETS_APPEND_MAX_RETRIES', '5'))
+
+LEAD_SHEET_HEADERS = ["Business Name", "Phone", "Address", "Type", "Area", "Status", "Call Date", "Call Notes", "Result"]
+
+ORDERS_SHEET_HEADERS = [
+    "Order ID", "Customer Name", "Phone", "Email", "Business Name",
+    "Quantity", "Subtotal", "Discount", "Total", "Delivery Address",
+    "Status", "Order Date", "Payment Session", "Notes"
+]
+
+NOTIFICATIONS_SHEET_HEADERS = ["Email", "Product", "Size", "Status", "Subscribed At", "Notes"]
+
+# "google" (default) or "fake" for the offline stand-in in fake_sheets.py (load testing without quota)
+SHEETS_BACKEND = os.environ.get('GOOGLE_SHEETS_BACKEND', 'google').lower()
+
+# Sheets API requests allowed per minute by this process (set to the project quota divided by worker count)
+SHEETS_QUOTA_PER_MINUTE = float(os.environ.get('GOOGLE_SHEETS_QUOTA_PER_MINUTE', '60'))
+# Retries of a request rejected with 429/408/5xx, with exponential backoff and jitter
+SHEETS_MAX_RETRIES = int(os.environ.get('GOOGLE_SHEETS_MAX_RETRIES', '5'))
+SHEETS_BACKOFF_BASE_SECONDS = float(os.environ.get('GOOGLE_SHEETS_BACKOFF_BASE', '1.0'))
+SHEETS_BACKOFF_MAX_SECONDS = float(os.environ.get('GOOGLE_SHEETS_BACKOFF_MAX', '32.0'))
+
+# Dedicated pool for blocking gspread calls made from async endpoints
+SHEETS_EXECUTOR_WORKERS = int(os.environ.get('GOOGLE_SHEETS_EXECUTOR_WORKERS', '4'))
+SHEETS_EXECUTOR_MAX_PENDING = int(os.environ.get('GOOGLE_SHEETS_EXECUTOR_MAX_PENDING', '100'))
+SHEETS_CALL_TIMEOUT = float(os.environ.get('GOOGLE_SHEETS_CALL_TIMEOUT', '15.0'))
+
+# Orders sheet index used by the order tracking fallback
+ORDERS_INDEX_TTL_SECONDS = float(os.environ.get('GOOGLE_SHEETS_ORDERS_INDEX_TTL', '300'))
+ORDERS_INDEX_MIN_REFRESH_SECONDS = float(os.environ.get('GOOGLE_SHEETS_ORDERS_INDEX_MIN_REFRESH', '30'))
+ORDERS_NEGATIVE_CACHE_SECONDS = float(os.environ.get('GOOGLE_SHEETS_ORDERS_NEGATIVE_TTL', '60'))
+
+# Lead sheet columns written by update_lead_status (Status, Call Date, Call Notes, Result)
+LEAD_UPDATE_COLUMNS = {'status': 'F', 'call_date': 'G', 'call_notes': 'H', 'result': 'I'}
+
+# How long the phone -> row index of a leads worksheet is trusted before it is re-read
+LEAD_INDEX_TTL_SECONDS = float(os.environ.get('GOOGLE_SHEETS_LEAD_INDEX_TTL', '300'))
+
+# (spreadsheet id, worksheet id) -> (built at, {phone: row number}), shared by all managers
+_lead_row_indexes: Dict[Tuple[str, int], Tuple[float, Dict[str, int]]] = {}
+_lead_row_indexes_lock = threading.Lock()
+
+SHEETS_SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# One authorized client per credentials file, plus spreadsheet/worksheet handles by URL and title.
+# gspread's session refreshes the service-account token by itself, so the client lives for the process.
+_sheets_clients: Dict[str, gspread.Client] = {}
+_spreadsheets: Dict[Tuple[str, str], gspread.Spreadsheet] = {}
+_worksheets: Dict[Tuple[str, str, str], gspread.Worksheet] = {}
+_handles_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Each acquire takes one token; tokens refill continuously
+    at rate_per_minute up to a burst of `capacity`.
+    """
+    
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_minute: Sustained requests per minute
+            capacity: Burst size (defaults to one second's worth, at least 1)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats_counters = {
+            'acquired': 0,
+            'waited': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0
+        }
+    
+    def acquire(self) -> float:
+        """
+        Take a token, sleeping until one is available.
+        
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now (the balance may go negative) so waiters queue up fairly
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.stats_counters['acquired'] += 1
+            if wait > 0:
+                self.stats_counters['waited'] += 1
+                self.stats_counters['wait_seconds_total'] += wait
+                self.stats_counters['wait_seconds_max'] = max(self.stats_counters['wait_seconds_max'], wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self.stats_counters)
+        counters['wait_seconds_total'] = round(counters['wait_seconds_total'], 3)
+        counters['wait_seconds_max'] = round(counters['wait_seconds_max'], 3)
+        return {**counters, 'rate_per_minute': round(self.rate * 60, 2), 'capacity': self.capacity}
+
+
+# Shared by every Sheets request made in this process
+sheets_rate_limiter = TokenBucket(SHEETS_QUOTA_PER_MINUTE)
+sheets_retry_stats = {
+    'retries': 0,
+    'rate_limited': 0,
+    'server_errors': 0,
+    'backoff_seconds_total': 0.0,
+    'gave_up': 0
+}
+
+
+RETRYABLE_STATUS = {408, 429}
+
+
+def call_with_backoff(request: Callable) -> Any:
+    """
+    Make one Sheets API request: take a token from sheets_rate_limiter first and retry
+    429/408/5xx errors with exponential backoff and full jitter
+    """
+    attempt = 0
+    while True:
+        sheets_rate_limiter.acquire()
+        try:
+            return request()
+        except APIError as e:
+            code = e.code
+            if not (code in RETRYABLE_STATUS or code >= 500):
+                raise
+            if attempt >= SHEETS_MAX_RETRIES:
+                sheets_retry_stats['gave_up'] += 1
+                raise
+            sheets_retry_stats['rate_limited' if code == 429 else 'server_errors'] += 1
+            delay = random.uniform(0, min(SHEETS_BACKOFF_MAX_SECONDS, SHEETS_BACKOFF_BASE_SECONDS * 2 ** attempt))
+            sheets_retry_stats['retries'] += 1
+            sheets_retry_stats['backoff_seconds_total'] += delay
+            attempt += 1
+            logger.warning(f"Google Sheets API returned {code}, retry {attempt} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+class RateLimitedHTTPClient(HTTPClient):
+    """gspread HTTP client that sends every request through call_with_backoff"""
+    
+    def request(self, *args, **kwargs):
+        send = super().request
+        return call_with_backoff(lambda: send(*args, **kwargs))
+
+
+def sheets_rate_limit_stats() -> Dict:
+    """Limiter wait time and 429/5xx retry counters for monitoring"""
+    return {
+        'limiter': sheets_rate_limiter.stats(),
+        'retries': {**sheets_retry_stats, 'backoff_seconds_total': round(sheets_retry_stats['backoff_seconds_total'], 3)}
+    }
+
+
+def get_sheets_client(credentials_json_path: Optional[str]) -> Optional[gspread.Client]:
+    """
+    Shared authorized gspread client for a service-account file, created on first use
+    
+    Returns:
+        gspread Client, or None if the credentials file does not exist
+    """
+    with _handles_lock:
+        client = _sheets_clients.get(credentials_json_path)
+    if client is not None:
+        return client
+    
+    if SHEETS_BACKEND == 'fake':
+        from fake_sheets import get_fake_client
+        return get_fake_client()
+    
+    if not credentials_json_path or not os.path.exists(credentials_json_path):
+        return None
+    
+    creds = Credentials.from_service_account_file(credentials_json_path, scopes=SHEETS_SCOPES)
+    client = gspread.authorize(creds, http_client=RateLimitedHTTPClient)
+    with _handles_lock:
+        client = _sheets_clients.setdefault(credentials_json_path, client)
+    logger.info("Successfully authenticated with Google Sheets")
+    return client
+
+
+def invalidate_worksheet(sheet_url: str, worksheet_name: Optional[str] = None):
+    """
+    Forget cached handles for a spreadsheet (or one of its worksheets), e.g. after a call
+    on the handle failed because the worksheet was renamed or deleted
+    """
+    with _handles_lock:
+        for key in [key for key in _worksheets if key[1] == sheet_url
+                    and (worksheet_name is None or key[2] == worksheet_name.lower())]:
+            del _worksheets[key]
+        if worksheet_name is None:
+            for key in [key for key in _spreadsheets if key[1] == sheet_url]:
+                del _spreadsheets[key]
+
+
+def normalize_phone(phone: str, default_area_code: str = "876") -> str:
+    """
+    Normalize a phone number to E.164 so "876-555-1234", "(876) 555 1234" and "+18765551234" match.
+    7-digit local numbers get the Jamaican area code.
+    """
+    digits = re.sub(r'\D', '', str(phone or ''))
+    if not digits:
+        return ""
+    if str(phone).strip().startswith('+'):
+        return f"+{digits}"
+    if len(digits) == 7:
+        return f"+1{default_area_code}{digits}"
+    if len(digits) == 10:
+        return f"+1{digits}"
+    return f"+{digits}"
+
+
+def append_call_notes(existing_notes: str, call_notes: str) -> str:
+    """Call notes are appended to what the lead row already has, one call per line"""
+    return f"{existing_notes}\n{call_notes}" if existing_notes else call_notes
+
+
+def is_open_lead(lead: Dict) -> bool:
+    """Leads still worth calling: not yet contacted, sold or marked not interested"""
+    return str(lead.get('status', '')).lower() not in ['contacted', 'sold', 'not interested']
+
+
+def order_row(order: Dict) -> List:
+    """
+    Row for a paid order in the Orders sheet layout (see ORDERS_SHEET_HEADERS)
+    
+    Args:
+        order: Order document as stored in db.orders
+    """
+    discount = float(order.get("discount", 0) or 0)
+    created_at = order.get("created_at") or ""
+    try:
+        order_date = datetime.fromisoformat(created_at).strftime("%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        order_date = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return [
+        order.get("order_id", ""),
+        order.get("customer_name", ""),
+        order.get("customer_phone", ""),
+        order.get("customer_email", ""),
+        order.get("business_name") or "",
+        str(order.get("quantity", 0)),
+        f"${float(order.get('subtotal', 0) or 0):.2f}",
+        f"${discount:.2f}" if discount > 0 else "$0.00",
+        f"${float(order.get('total', 0) or 0):.2f}",
+        order.get("delivery_address", ""),
+        order.get("status", "Planning"),
+        order_date,
+        order.get("session_id", ""),
+        f"Bulk Order: {order.get('bulk_order_tier', '')}" if order.get("is_bulk_order") else "Regular Order"
+    ]
+
+
+def lead_row_hash(lead: Dict) -> str:
+    """
+    Content hash of a lead read from the sheet, used to skip unchanged rows on sync.
+    The row number is left out so inserting, deleting or sorting rows does not change the hash of every row below.
+    """
+    content = {field: value for field, value in lead.items() if field != 'row_number'}
+    payload = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def lead_row(business_name: str, phone: str, address: str = "", business_type: str = "",
+             area: str = "", status: str = "New") -> List[str]:
+    """Row for a new lead in the leads sheet layout (see LEAD_SHEET_HEADERS)"""
+    return [business_name, phone, address, business_type, area, status, "", "", ""]
+
 class GoogleSheetsLeadManager:
     """Manages leads from Google Sheets"""
     
@@ -29,29 +327,71 @@ class GoogleSheetsLeadManager:
     def authenticate(self):
         """Authenticate with Google Sheets API"""
         try:
-            if not self.credentials_json_path or not os.path.exists(self.credentials_json_path):
+            # Reuses the process-wide client for these credentials
+            self.client = get_sheets_client(self.credentials_json_path)
+            if self.client is None:
                 logger.warning("Google Sheets credentials not found. Please set GOOGLE_SHEETS_CREDENTIALS_PATH")
                 return False
-                
-            # Define the scope
-            scope = [
-                'https://www.googleapis.com/auth/spreadsheets',
-                'https://www.googleapis.com/auth/drive'
-            ]
-            
-            # Authenticate using service account
-            creds = Credentials.from_service_account_file(
-                self.credentials_json_path, 
-                scopes=scope
-            )
-            self.client = gspread.authorize(creds)
-            logger.info("Successfully authenticated with Google Sheets")
             return True
             
         except Exception as e:
             logger.error(f"Failed to authenticate with Google Sheets: {str(e)}")
             return False
     
+    def open_spreadsheet(self, sheet_url: str) -> Optional[gspread.Spreadsheet]:
+        """Spreadsheet handle for a URL, opened once per process"""
+        if not self.client and not self.authenticate():
+            return None
+        
+        key = (self.credentials_json_path, sheet_url)
+        with _handles_lock:
+            spreadsheet = _spreadsheets.get(key)
+        if spreadsheet is None:
+            spreadsheet = self.client.open_by_url(sheet_url)
+            with _handles_lock:
+                spreadsheet = _spreadsheets.setdefault(key, spreadsheet)
+        return spreadsheet
+    
+    def open_worksheet(self, sheet_url: str, worksheet_name: str, headers: Optional[List[str]] = None,
+                       fallback_to_first: bool = True):
+        """
+        Find a worksheet by title (case-insensitive). Handles are cached per process.
+        
+        If it does not exist it is created with the given header row, or, without headers,
+        the first worksheet of the spreadsheet is used instead (unless fallback_to_first is False).
+        
+        Args:
+            sheet_url: URL of the Google Sheet
+            worksheet_name: Title of the worksheet
+            headers: Header row for a newly created worksheet (optional)
+            fallback_to_first: Use the first worksheet when there is no match and no headers
+            
+        Returns:
+            gspread Worksheet, or None if not authenticated or no worksheet matches
+        """
+        key = (self.credentials_json_path, sheet_url, worksheet_name.lower())
+        with _handles_lock:
+            worksheet = _worksheets.get(key)
+        if worksheet is not None:
+            return worksheet
+        
+        spreadsheet = self.open_spreadsheet(sheet_url)
+        if spreadsheet is None:
+            return None
+        
+        worksheets = spreadsheet.worksheets()
+        worksheet = next((ws for ws in worksheets if ws.title.lower() == worksheet_name.lower()), None)
+        if worksheet is None and headers:
+            worksheet = spreadsheet.add_worksheet(title=worksheet_name, rows="1000", cols=str(max(20, len(headers))))
+            worksheet.append_row(headers)
+            logger.info(f"Created worksheet '{worksheet_name}' with headers")
+        if worksheet is None:
+            # Fallback handles are not cached so a worksheet created later is picked up
+            return worksheets[0] if fallback_to_first and worksheets else None
+        
+        with _handles_lock:
+            return _worksheets.setdefault(key, worksheet)
+    
     def connect_to_sheet(self, sheet_url: str, worksheet_name: str = "Sheet1"):
         """
         Connect to a specific Google Sheet
@@ -65,10 +405,11 @@ class GoogleSheetsLeadManager:
                 if not self.authenticate():
                     return False
             
-            # Open the spreadsheet by URL
-            spreadsheet = self.client.open_by_url(sheet_url)
-            self.sheet = spreadsheet.worksheet(worksheet_name)
-            logger.info(f"Connected to sheet: {spreadsheet.title}, worksheet: {worksheet_name}")
+            # Cached spreadsheet/worksheet handles, so reconnecting costs no API calls
+            self.sheet = self.open_worksheet(sheet_url, worksheet_name, fallback_to_first=False)
+            if self.sheet is None:
+                logger.error(f"Worksheet '{worksheet_name}' not found")
+                return False
             return True
             
         except Exception as e:
@@ -77,7 +418,22 @@ class GoogleSheetsLeadManager:
     
     def get_leads(self, sheet_url: str = None, worksheet_name: str = "Sheet1") -> List[Dict]:
         """
-        Get all leads from the Google Sheet
+        Get the leads still worth calling from the Google Sheet
+        
+        Args:
+            sheet_url: URL of the Google Sheet (optional if already connected)
+            worksheet_name: Name of the worksheet
+            
+        Returns:
+            List of lead dictionaries (see get_lead_records)
+        """
+        leads = [lead for lead in self.get_lead_records(sheet_url, worksheet_name) if is_open_lead(lead)]
+        logger.info(f"Retrieved {len(leads)} leads from sheet")
+        return leads
+    
+    def get_lead_records(self, sheet_url: str = None, worksheet_name: str = "Sheet1") -> List[Dict]:
+        """
+        Get every lead with a phone number from the Google Sheet, whatever its status
         
         Expected columns: Business Name, Phone, Address, Type, Area, Status, Call Date, Call Notes, Result
         
@@ -86,7 +442,7 @@ class GoogleSheetsLeadManager:
             worksheet_name: Name of the worksheet
             
         Returns:
-            List of lead dictionaries
+            List of lead dictionaries, each with the sheet row_number
         """
         try:
             if sheet_url:
@@ -102,10 +458,10 @@ class GoogleSheetsLeadManager:
             records = self.sheet.get_all_records()
             
             leads = []
-            for record in records:
-                # Only include leads that have a phone number and are not marked as "Contacted" or "Sold"
-                status = record.get('Status', '').lower()
-                if record.get('Phone') and status not in ['contacted', 'sold', 'not interested']:
+            # Row 1 holds the headers, so the first record is sheet row 2
+            for row_number, record in enumerate(records, start=2):
+                # Only include leads that have a phone number
+                if record.get('Phone'):
                     leads.append({
                         'business_name': record.get('Business Name', ''),
                         'phone': str(record.get('Phone', '')),
@@ -115,17 +471,93 @@ class GoogleSheetsLeadManager:
                         'status': record.get('Status', 'New'),
                         'call_date': record.get('Call Date', ''),
                         'call_notes': record.get('Call Notes', ''),
-                        'result': record.get('Result', '')
+                        'result': record.get('Result', ''),
+                        'row_number': row_number
                     })
             
-            logger.info(f"Retrieved {len(leads)} leads from sheet")
             return leads
             
         except Exception as e:
             logger.error(f"Failed to get leads: {str(e)}")
             return []
     
-    def update_lead_status(self, phone: str, status: str, call_date: str = "", call_notes: str = "", result: str = ""):
+    def _lead_row_index(self, refresh: bool = False) -> Dict[str, int]:
+        """
+        E.164 phone -> row number for the connected worksheet, read with one batch_get of the
+        Phone (B) column and cached for LEAD_INDEX_TTL_SECONDS.
+        
+        Only row numbers are cached; they are checked against the sheet before every write
+        (see _resolve_lead_rows), so a sort or hand-inserted row costs a re-read, not a wrong write.
+        """
+        key = (self.sheet.spreadsheet_id, self.sheet.id)
+        with _lead_row_indexes_lock:
+            cached = _lead_row_indexes.get(key)
+        if cached and not refresh and time.monotonic() - cached[0] < LEAD_INDEX_TTL_SECONDS:
+            return cached[1]
+        
+        phones = self.sheet.batch_get(['B:B'])[0]
+        index = {}
+        for row_number, phone_row in enumerate(phones, start=1):
+            if phone_row and phone_row[0]:
+                index.setdefault(normalize_phone(phone_row[0]), row_number)
+        
+        with _lead_row_indexes_lock:
+            _lead_row_indexes[key] = (time.monotonic(), index)
+        return index
+    
+    def _read_lead_cells(self, rows: List[int]) -> Dict[int, Tuple[str, str]]:
+        """Current (phone, call notes) of the given rows, read with one batch_get"""
+        rows = sorted(set(rows))
+        if not rows:
+            return {}
+        values = self.sheet.batch_get([f"B{row}:H{row}" for row in rows])
+        cells = {}
+        for row, value in zip(rows, values):
+            row_cells = value[0] if value else []
+            phone = str(row_cells[0]) if row_cells else ""
+            notes = str(row_cells[6]) if len(row_cells) > 6 else ""
+            cells[row] = (phone, notes)
+        return cells
+    
+    def _resolve_lead_rows(self, updates: List[Dict]) -> Dict[str, Tuple[int, str]]:
+        """
+        E.164 phone -> (row number, current call notes) for the leads being updated.
+        
+        Rows come from the update's row_number hint or the cached phone index and are then
+        verified by reading their Phone and Call Notes cells; rows whose phone no longer matches
+        are looked up again in a freshly read index.
+        """
+        keys = {normalize_phone(update['phone']): update.get('row_number') for update in updates}
+        
+        index = None
+        rows = {}
+        for key, hint in keys.items():
+            if hint:
+                rows[key] = hint
+                continue
+            if index is None:
+                index = self._lead_row_index()
+            if key in index:
+                rows[key] = index[key]
+        
+        resolved = self._verified_lead_rows(rows)
+        retry = [key for key in keys if key not in resolved]
+        if retry:
+            index = self._lead_row_index(refresh=True)
+            resolved.update(self._verified_lead_rows({key: index[key] for key in retry if key in index}))
+        return resolved
+    
+    def _verified_lead_rows(self, rows: Dict[str, int]) -> Dict[str, Tuple[int, str]]:
+        """The rows whose Phone cell still holds the expected number, with their current call notes"""
+        cells = self._read_lead_cells(list(rows.values()))
+        return {
+            key: (row, cells[row][1])
+            for key, row in rows.items()
+            if normalize_phone(cells[row][0]) == key
+        }
+    
+    def update_lead_status(self, phone: str, status: str, call_date: str = "", call_notes: str = "", result: str = "",
+                           row_number: Optional[int] = None):
         """
         Update the status and call details of a lead in the sheet
         
@@ -135,46 +567,70 @@ class GoogleSheetsLeadManager:
             call_date: Date of the call
             call_notes: Notes from the call
             result: Result of the call (e.g., "Order placed", "Follow up needed", "Not interested")
+            row_number: Sheet row of the lead if already known (e.g. from the lead_phone_index mirror)
         """
+        updated = self.update_lead_statuses([{
+            'phone': phone,
+            'status': status,
+            'call_date': call_date,
+            'call_notes': call_notes,
+            'result': result,
+            'row_number': row_number
+        }])
+        return bool(updated.get(phone))
+    
+    def update_lead_statuses(self, updates: List[Dict]) -> Dict[str, Optional[int]]:
+        """
+        Update many leads with one batch_get of their current cells and one batch_update
+        
+        Args:
+            updates: Dicts with phone and any of status, call_date, call_notes, result.
+                     Empty fields are left unchanged; call notes are appended to the notes
+                     currently in the sheet. An optional row_number is used as a hint and verified.
+            
+        Returns:
+            Dict of phone -> sheet row that was updated, or None if the lead was not found
+        """
+        outcome = {update['phone']: None for update in updates}
         try:
             if not self.sheet:
                 logger.error("Not connected to any sheet")
-                return False
+                return outcome
             
-            # Find the row with this phone number
-            cell = self.sheet.find(phone)
-            if cell:
-                row_number = cell.row
-                
-                # Column indices (1-based): Business Name=1, Phone=2, Address=3, Type=4, Area=5, Status=6, Call Date=7, Call Notes=8, Result=9
-                
-                # Update status column (column 6)
-                if status:
-                    self.sheet.update_cell(row_number, 6, status)
-                
-                # Update call date column (column 7)
-                if call_date:
-                    self.sheet.update_cell(row_number, 7, call_date)
-                
-                # Update call notes column (column 8)
-                if call_notes:
-                    existing_notes = self.sheet.cell(row_number, 8).value or ""
-                    updated_notes = f"{existing_notes}\n{call_notes}" if existing_notes else call_notes
-                    self.sheet.update_cell(row_number, 8, updated_notes)
-                
-                # Update result column (column 9)
-                if result:
-                    self.sheet.update_cell(row_number, 9, result)
+            rows = self._resolve_lead_rows(updates)
+            
+            data = []
+            new_notes = {}
+            for update in updates:
+                phone = update['phone']
+                key = normalize_phone(phone)
+                if key not in rows:
+                    logger.warning(f"Phone number {phone} not found in sheet")
+                    continue
+                row_number, existing_notes = rows[key]
+                existing_notes = new_notes.get(key, existing_notes)
                 
-                logger.info(f"Updated lead status for {phone} to {status}")
-                return True
-            else:
-                logger.warning(f"Phone number {phone} not found in sheet")
-                return False
+                for field, column in LEAD_UPDATE_COLUMNS.items():
+                    value = update.get(field)
+                    if not value:
+                        continue
+                    if field == 'call_notes':
+                        value = append_call_notes(existing_notes, value)
+                        new_notes[key] = value
+                    data.append({'range': f"{column}{row_number}", 'values': [[value]]})
+                outcome[phone] = row_number
+            
+            if data:
+                self.sheet.batch_update(data, raw=False)
+            
+            for phone, updated in outcome.items():
+                if updated:
+                    logger.info(f"Updated lead status for {phone}")
+            return outcome
                 
         except Exception as e:
             logger.error(f"Failed to update lead status: {str(e)}")
-            return False
+            return {phone: None for phone in outcome}
     
     def add_lead(self, business_name: str, phone: str, address: str = "", business_type: str = "", area: str = "", status: str = "New"):
         """
@@ -194,7 +650,7 @@ class GoogleSheetsLeadManager:
                 return False
             
             # Append new row: Business Name, Phone, Address, Type, Area, Status, Call Date, Call Notes, Result
-            row = [business_name, phone, address, business_type, area, status, "", "", ""]
+            row = lead_row(business_name, phone, address, business_type, area, status)
             self.sheet.append_row(row)
             
             logger.info(f"Added new lead: {business_name} ({phone})")
@@ -205,6 +661,434 @@ class GoogleSheetsLeadManager:
             return False
 
 
+class SheetsAppendQueue:
+    """
+    Write-behind queue for appending rows to Google Sheets.
+    
+    Endpoints enqueue rows after their MongoDB write and return immediately. Rows are buffered
+    per (sheet URL, worksheet) and a background thread sends each buffer as a single
+    append_rows call. A failed flush keeps the rows (in order) and retries with exponential
+    backoff; after max_retries attempts the rows are logged and dropped, MongoDB stays authoritative.
+    """
+    
+    def __init__(self, manager: Optional[GoogleSheetsLeadManager] = None,
+                 batch_size: int = SHEETS_APPEND_BATCH_SIZE,
+                 flush_interval: float = SHEETS_APPEND_FLUSH_SECONDS,
+                 max_retries: int = SHEETS_APPEND_MAX_RETRIES):
+        """
+        Args:
+            manager: Sheets manager used for flushing (one is created from the environment if omitted)
+            batch_size: Buffered rows that trigger an immediate flush
+            flush_interval: Maximum seconds a row waits in the buffer
+            max_retries: Failed flushes before a buffer is dropped
+        """
+        self.manager = manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._buffers: Dict[Tuple[str, str], List[List]] = {}
+        self._headers: Dict[Tuple[str, str], Optional[List[str]]] = {}
+        self._failures: Dict[Tuple[str, str], int] = {}
+        self._retry_at: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.stats_counters = {
+            'enqueued': 0,
+            'appended': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'dropped': 0
+        }
+    
+    def start(self):
+        """Start the background flush thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="sheets-append-queue", daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout: float = 10.0):
+        """Stop the flush thread after one last flush of everything still buffered"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def enqueue(self, sheet_url: str, worksheet_name: str, row: List, headers: Optional[List[str]] = None):
+        """
+        Buffer a row for appending.
+        
+        Args:
+            sheet_url: URL of the Google Sheet
+            worksheet_name: Worksheet title (matched case-insensitively, see open_worksheet)
+            row: Cell values
+            headers: Header row used if the worksheet has to be created
+        """
+        key = (sheet_url, worksheet_name)
+        with self._lock:
+            self._buffers.setdefault(key, []).append(list(row))
+            if headers:
+                self._headers[key] = headers
+            self.stats_counters['enqueued'] += 1
+            full = len(self._buffers[key]) >= self.batch_size
+        self.start()
+        if full:
+            self._wake.set()
+    
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            stopping = self._stopping
+            self.flush(force=stopping)
+            if stopping:
+                return
+    
+    def flush(self, force: bool = False):
+        """
+        Send every buffer that is not backing off after a failure.
+        
+        Args:
+            force: Ignore retry backoff (used for the final flush on shutdown)
+        """
+        with self._flush_lock:
+            now = time.monotonic()
+            with self._lock:
+                due = [
+                    key for key, rows in self._buffers.items()
+                    if rows and (force or self._retry_at.get(key, 0.0) <= now)
+                ]
+                batches = {key: self._buffers.pop(key) for key in due}
+            
+            for key, rows in batches.items():
+                self._flush_buffer(key, rows)
+    
+    def _flush_buffer(self, key: Tuple[str, str], rows: List[List]):
+        sheet_url, worksheet_name = key
+        try:
+            if self.manager is None:
+                self.manager = GoogleSheetsLeadManager(
+                    credentials_json_path=os.environ.get('GOOGLE_SHEETS_CREDENTIALS_PATH', '/app/backend/google_sheets_credentials.json')
+                )
+            worksheet = self.manager.open_worksheet(sheet_url, worksheet_name, self._headers.get(key))
+            if worksheet is None:
+                raise ValueError(f"Worksheet '{worksheet_name}' is not available")
+            
+            worksheet.append_rows(rows)
+            self.stats_counters['flushes'] += 1
+            self.stats_counters['appended'] += len(rows)
+            self._failures.pop(key, None)
+            self._retry_at.pop(key, None)
+            logger.info(f"Appended {len(rows)} row(s) to worksheet '{worksheet_name}'")
+            
+        except Exception as e:
+            self.stats_counters['failed_flushes'] += 1
+            invalidate_worksheet(sheet_url, worksheet_name)
+            failures = self._failures.get(key, 0) + 1
+            if failures >= self.max_retries:
+                self.stats_counters['dropped'] += len(rows)
+                self._failures.pop(key, None)
+                self._retry_at.pop(key, None)
+                logger.error(f"Dropping {len(rows)} row(s) for worksheet '{worksheet_name}' after {failures} failed flushes: {str(e)}; rows: {rows}")
+                return
+            
+            self._failures[key] = failures
+            self._retry_at[key] = time.monotonic() + self.flush_interval * (2 ** failures)
+            with self._lock:
+                # Put the rows back in front of anything enqueued meanwhile to keep sheet order
+                self._buffers[key] = rows + self._buffers.get(key, [])
+            logger.warning(f"Flush to worksheet '{worksheet_name}' failed (attempt {failures}), will retry: {str(e)}")
+    
+    def stats(self) -> Dict:
+        """Queue depth and append counters for monitoring"""
+        with self._lock:
+            buffered = sum(len(rows) for rows in self._buffers.values())
+        return {**self.stats_counters, 'buffered': buffered, 'backing_off': len(self._retry_at)}
+
+
+def get_worksheet(sheet_url: str, worksheet_name: str, headers: Optional[List[str]] = None,
+                  fallback_to_first: bool = True):
+    """
+    Cached worksheet handle using the configured service account (see GoogleSheetsLeadManager.open_worksheet)
+    """
+    manager = GoogleSheetsLeadManager(
+        credentials_json_path=os.environ.get('GOOGLE_SHEETS_CREDENTIALS_PATH', '/app/backend/google_sheets_credentials.json')
+    )
+    return manager.open_worksheet(sheet_url, worksheet_name, headers, fallback_to_first)
+
+
+class SheetsExecutorFullError(RuntimeError):
+    """Raised when too many Sheets calls are already waiting for a worker thread"""
+    pass
+
+
+class SheetsExecutor:
+    """
+    Size-limited thread pool for synchronous gspread calls.
+    
+    Calls wait at most `timeout` seconds; a call that times out keeps running on its
+    thread (threads cannot be interrupted) but the awaiting request is released.
+    """
+    
+    def __init__(self, max_workers: int = SHEETS_EXECUTOR_WORKERS,
+                 max_pending: int = SHEETS_EXECUTOR_MAX_PENDING,
+                 timeout: float = SHEETS_CALL_TIMEOUT):
+        """
+        Args:
+            max_workers: Threads making Sheets API calls
+            max_pending: Calls allowed to wait for a thread before new ones are rejected
+            timeout: Default seconds to wait for a call
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sheets")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self.stats_counters = {
+            'calls': 0,
+            'completed': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'rejected': 0,
+            'max_queue_depth': 0
+        }
+    
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run a blocking callable on the pool and await its result.
+        
+        Raises:
+            SheetsExecutorFullError: max_pending calls are already queued
+            asyncio.TimeoutError: the call did not finish within the timeout
+        """
+        with self._lock:
+            if self._queued >= self.max_pending:
+                self.stats_counters['rejected'] += 1
+                raise SheetsExecutorFullError("Too many Google Sheets calls queued")
+            self._queued += 1
+            self.stats_counters['calls'] += 1
+            self.stats_counters['max_queue_depth'] = max(self.stats_counters['max_queue_depth'], self._queued)
+        
+        def _call():
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+        
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, _call)
+        try:
+            # Shielded so a timeout never cancels a queued call and leaves the depth counter off
+            result = await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.stats_counters['timeouts'] += 1
+            name = getattr(func, '__name__', 'call')
+            logger.warning(f"Google Sheets {name} exceeded {timeout or self.timeout}s")
+            raise
+        except Exception:
+            self.stats_counters['errors'] += 1
+            raise
+        self.stats_counters['completed'] += 1
+        return result
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+    
+    def stats(self) -> Dict:
+        """Queue depth, in-flight calls and outcome counters for monitoring"""
+        with self._lock:
+            depth, running = self._queued, self._running
+        return {
+            **self.stats_counters,
+            'queue_depth': depth,
+            'running': running,
+            'max_workers': self.max_workers
+        }
+
+
+_sheets_executor: Optional[SheetsExecutor] = None
+
+
+def get_sheets_executor() -> SheetsExecutor:
+    """Process-wide Sheets executor, created on first use"""
+    global _sheets_executor
+    if _sheets_executor is None:
+        _sheets_executor = SheetsExecutor()
+    return _sheets_executor
+
+
+class AsyncGoogleSheetsLeadManager:
+    """
+    Async facade over GoogleSheetsLeadManager for use in async endpoints.
+    Every blocking call is dispatched to the shared SheetsExecutor instead of the event loop.
+    """
+    
+    def __init__(self, credentials_json_path: Optional[str] = None, executor: Optional[SheetsExecutor] = None):
+        """
+        Args:
+            credentials_json_path: Path to service account credentials JSON file (see GoogleSheetsLeadManager)
+            executor: Pool to run calls on (the process-wide one if omitted)
+        """
+        self.manager = GoogleSheetsLeadManager(credentials_json_path)
+        self.executor = executor or get_sheets_executor()
+    
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run any blocking Sheets callable (e.g. a worksheet method) on the executor"""
+        return await self.executor.run(func, *args, **kwargs)
+    
+    async def connect_to_sheet(self, sheet_url: str, worksheet_name: str = "Sheet1") -> bool:
+        return await self.run(self.manager.connect_to_sheet, sheet_url, worksheet_name)
+    
+    async def open_worksheet(self, sheet_url: str, worksheet_name: str, headers: Optional[List[str]] = None,
+                             fallback_to_first: bool = True):
+        return await self.run(self.manager.open_worksheet, sheet_url, worksheet_name, headers, fallback_to_first)
+    
+    async def get_leads(self, sheet_url: str = None, worksheet_name: str = "Sheet1") -> List[Dict]:
+        return await self.run(self.manager.get_leads, sheet_url, worksheet_name)
+    
+    async def get_lead_records(self, sheet_url: str = None, worksheet_name: str = "Sheet1") -> List[Dict]:
+        return await self.run(self.manager.get_lead_records, sheet_url, worksheet_name)
+    
+    async def update_lead_status(self, phone: str, status: str, call_date: str = "", call_notes: str = "",
+                                 result: str = "", row_number: Optional[int] = None) -> bool:
+        return await self.run(functools.partial(
+            self.manager.update_lead_status, phone, status,
+            call_date=call_date, call_notes=call_notes, result=result, row_number=row_number
+        ))
+    
+    async def update_lead_statuses(self, updates: List[Dict]) -> Dict[str, Optional[int]]:
+        return await self.run(self.manager.update_lead_statuses, updates)
+    
+    async def add_lead(self, *args, **kwargs) -> bool:
+        return await self.run(functools.partial(self.manager.add_lead, *args, **kwargs))
+
+
+class OrdersSheetIndex:
+    """
+    In-memory Order ID -> record index over the "Orders" worksheet.
+    
+    The index is rebuilt with one get_all_records call when it is older than ttl_seconds,
+    or on demand when an unknown ID is asked for and the last rebuild is at least
+    min_refresh_seconds old. IDs still missing after that go into a short negative cache,
+    so repeated hits for a bad ID cost a dict lookup.
+    """
+    
+    def __init__(self, worksheet_name: str = "Orders", ttl_seconds: float = ORDERS_INDEX_TTL_SECONDS,
+                 min_refresh_seconds: float = ORDERS_INDEX_MIN_REFRESH_SECONDS,
+                 negative_ttl_seconds: float = ORDERS_NEGATIVE_CACHE_SECONDS,
+                 executor: Optional[SheetsExecutor] = None):
+        """
+        Args:
+            worksheet_name: Worksheet holding the orders
+            ttl_seconds: Age after which the index is rebuilt on the next lookup
+            min_refresh_seconds: Minimum age before a miss may trigger an early rebuild
+            negative_ttl_seconds: How long an unknown ID is remembered as missing
+            executor: Pool for the blocking sheet read (the process-wide one if omitted)
+        """
+        self.worksheet_name = worksheet_name
+        self.ttl_seconds = ttl_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.executor = executor
+        self._records: Dict[str, Dict[str, Dict]] = {}  # sheet URL -> order ID -> record
+        self._built_at: Dict[str, float] = {}
+        self._missing = TTLCache(maxsize=10000, ttl=negative_ttl_seconds)
+        self._lock = asyncio.Lock()
+        self.stats_counters = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'refreshes': 0
+        }
+    
+    def _load(self, sheet_url: str) -> Dict[str, Dict]:
+        worksheet = get_worksheet(sheet_url, self.worksheet_name, fallback_to_first=False)
+        if worksheet is None:
+            return {}
+        return {
+            str(record.get("Order ID")): record
+            for record in worksheet.get_all_records()
+            if record.get("Order ID") not in (None, "")
+        }
+    
+    async def refresh(self, sheet_url: str, max_age: float = 0.0):
+        """
+        Rebuild the index for a spreadsheet.
+        
+        Args:
+            sheet_url: URL of the Google Sheet
+            max_age: Skip the rebuild if the index is younger than this (another caller just rebuilt it)
+        """
+        async with self._lock:
+            if max_age and self._age(sheet_url) < max_age:
+                return
+            executor = self.executor or get_sheets_executor()
+            records = await executor.run(self._load, sheet_url)
+            self._records[sheet_url] = records
+            self._built_at[sheet_url] = time.monotonic()
+            self._missing.clear()
+            self.stats_counters['refreshes'] += 1
+            logger.info(f"Indexed {len(records)} orders from Google Sheets")
+    
+    def _age(self, sheet_url: str) -> float:
+        return time.monotonic() - self._built_at.get(sheet_url, float('-inf'))
+    
+    async def lookup(self, sheet_url: str, order_id: str) -> Optional[Dict]:
+        """
+        Sheet record (column header -> value) for an order, or None if the sheet does not have it
+        """
+        if (sheet_url, order_id) in self._missing:
+            self.stats_counters['negative_hits'] += 1
+            return None
+        
+        if self._age(sheet_url) >= self.ttl_seconds:
+            await self.refresh(sheet_url, self.ttl_seconds)
+        
+        record = self._records.get(sheet_url, {}).get(order_id)
+        if record is None and self._age(sheet_url) >= self.min_refresh_seconds:
+            # The order may have been appended since the last rebuild
+            await self.refresh(sheet_url, self.min_refresh_seconds)
+            record = self._records.get(sheet_url, {}).get(order_id)
+        
+        if record is None:
+            self.stats_counters['misses'] += 1
+            self._missing[(sheet_url, order_id)] = True
+            return None
+        
+        self.stats_counters['hits'] += 1
+        return record
+    
+    def stats(self) -> Dict:
+        """Index size and lookup counters for monitoring"""
+        return {
+            **self.stats_counters,
+            'indexed_orders': sum(len(records) for records in self._records.values()),
+            'negative_cache_size': len(self._missing)
+        }
+
+
+_append_queue: Optional[SheetsAppendQueue] = None
+
+
+def get_append_queue() -> SheetsAppendQueue:
+    """Process-wide write-behind queue, created on first use"""
+    global _append_queue
+    if _append_queue is None:
+        _append_queue = SheetsAppendQueue()
+    return _append_queue
+
+
 # Example usage and setup instructions
 SETUP_INSTRUCTIONS = """
 GOOGLE SHEETS INTEGRATION SETUP:
@@ -0,0 +1,230 @@
+"""
+Durable background jobs backed by MongoDB
+Jobs live in the "jobs" collection and are claimed with a lease, so a job whose worker died is
+picked up again once the lease expires. Failed jobs are retried with exponential backoff and
+moved to "jobs_dead_letter" after the last attempt.
+"""
+import os
+import uuid
+import random
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ASCENDING, ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '4'))
+# A claimed job must finish within its lease; after that another worker may take it over
+JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', '120'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '6'))
+JOB_BACKOFF_BASE_SECONDS = float(os.environ.get('JOB_BACKOFF_BASE_SECONDS', '10'))
+JOB_BACKOFF_MAX_SECONDS = float(os.environ.get('JOB_BACKOFF_MAX_SECONDS', '1800'))
+# Idle workers re-check for due jobs this often (new jobs enqueued in-process wake them at once)
+JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', '2'))
+
+JobHandler = Callable[[Dict], Awaitable[None]]
+
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat()
+
+
+class JobQueue:
+    """
+    Mongo job queue plus an in-process pool of async workers.
+
+    Job documents:
+        _id, type, payload, status ("pending" | "running"), attempts, run_at,
+        lease_id, lease_expires_at, last_error, created_at, updated_at
+    Completed jobs are deleted; jobs out of attempts are moved to the dead-letter collection.
+    """
+
+    def __init__(self, database, collection: str = "jobs", dead_letter_collection: str = "jobs_dead_letter",
+                 workers: int = JOB_WORKERS, lease_seconds: float = JOB_LEASE_SECONDS,
+                 max_attempts: int = JOB_MAX_ATTEMPTS, poll_seconds: float = JOB_POLL_SECONDS):
+        """
+        Args:
+            database: Motor database
+            collection: Collection holding pending and running jobs
+            dead_letter_collection: Collection receiving jobs that ran out of attempts
+            workers: Concurrent jobs per process
+            lease_seconds: How long a claimed job is reserved for its worker
+            max_attempts: Attempts before a job is dead-lettered
+            poll_seconds: Idle poll interval
+        """
+        self.jobs = database[collection]
+        self.dead_letters = database[dead_letter_collection]
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats_counters = {
+            'enqueued': 0,
+            'completed': 0,
+            'retried': 0,
+            'dead_lettered': 0
+        }
+
+    def register(self, job_type: str, handler: JobHandler):
+        """Register the coroutine that runs jobs of `job_type`; it is called with the job payload"""
+        self.handlers[job_type] = handler
+
+    async def ensure_indexes(self):
+        await self.jobs.create_index([("status", ASCENDING), ("run_at", ASCENDING)])
+        await self.jobs.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+
+    def _job_doc(self, job_type: str, payload: Dict, now: datetime) -> Dict:
+        return {
+            "_id": str(uuid.uuid4()),
+            "type": job_type,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "run_at": _iso(now),
+            "lease_id": None,
+            "lease_expires_at": None,
+            "last_error": None,
+            "created_at": _iso(now),
+            "updated_at": _iso(now)
+        }
+
+    async def enqueue(self, job_type: str, payload: Dict) -> str:
+        """Persist one job to run as soon as a worker is free; returns its ID"""
+        return (await self.enqueue_many([(job_type, payload)]))[0]
+
+    async def enqueue_many(self, jobs: List[tuple]) -> List[str]:
+        """
+        Persist several jobs with one insert.
+
+        Args:
+            jobs: (job type, payload) pairs
+
+        Returns:
+            The job IDs, in order
+        """
+        now = datetime.now(timezone.utc)
+        docs = [self._job_doc(job_type, payload, now) for job_type, payload in jobs]
+        if docs:
+            await self.jobs.insert_many(docs)
+            self.stats_counters['enqueued'] += len(docs)
+            if self._wakeup is not None:
+                self._wakeup.set()
+        return [doc["_id"] for doc in docs]
+
+    async def _claim(self) -> Optional[Dict]:
+        """Lease the oldest due job: pending and due, or running with an expired lease"""
+        now = datetime.now(timezone.utc)
+        return await self.jobs.find_one_and_update(
+            {
+                "type": {"$in": list(self.handlers)},
+                "$or": [
+                    {"status": "pending", "run_at": {"$lte": _iso(now)}},
+                    {"status": "running", "lease_expires_at": {"$lte": _iso(now)}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "lease_id": str(uuid.uuid4()),
+                    "lease_expires_at": _iso(now + timedelta(seconds=self.lease_seconds)),
+                    "worker": self.worker_id,
+                    "updated_at": _iso(now)
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _backoff_seconds(self, attempts: int) -> float:
+        delay = min(JOB_BACKOFF_MAX_SECONDS, JOB_BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _fail(self, job: Dict, error: str):
+        now = datetime.now(timezone.utc)
+        owned = {"_id": job["_id"], "lease_id": job["lease_id"]}
+        if job["attempts"] >= self.max_attempts:
+            dead = {**job, "status": "dead", "last_error": error, "failed_at": _iso(now), "updated_at": _iso(now)}
+            await self.dead_letters.replace_one({"_id": job["_id"]}, dead, upsert=True)
+            await self.jobs.delete_one(owned)
+            self.stats_counters['dead_lettered'] += 1
+            logger.error(f"Job {job['_id']} ({job['type']}) dead-lettered after {job['attempts']} attempts: {error}")
+            return
+
+        delay = self._backoff_seconds(job["attempts"])
+        await self.jobs.update_one(owned, {"$set": {
+            "status": "pending",
+            "run_at": _iso(now + timedelta(seconds=delay)),
+            "lease_id": None,
+            "lease_expires_at": None,
+            "last_error": error,
+            "updated_at": _iso(now)
+        }})
+        self.stats_counters['retried'] += 1
+        logger.warning(f"Job {job['_id']} ({job['type']}) failed (attempt {job['attempts']}), retrying in {delay:.0f}s: {error}")
+
+    async def _run(self, job: Dict):
+        try:
+            # Give up before the lease runs out so no other worker starts the same job meanwhile
+            await asyncio.wait_for(self.handlers[job["type"]](job["payload"]), timeout=self.lease_seconds)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            await self._fail(job, f"timed out after {self.lease_seconds:.0f}s")
+            return
+        except Exception as e:
+            await self._fail(job, str(e) or type(e).__name__)
+            return
+        await self.jobs.delete_one({"_id": job["_id"], "lease_id": job["lease_id"]})
+        self.stats_counters['completed'] += 1
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await self._claim()
+                if job is not None:
+                    await self._run(job)
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker error: {str(e)}")
+                await asyncio.sleep(self.poll_seconds)
+
+    def start(self):
+        """Start the worker tasks on the running event loop (no-op if already started)"""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Started {self.workers} job worker(s) for: {', '.join(sorted(self.handlers))}")
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running are retried after their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def stats(self) -> Dict:
+        """Counters for this process plus queue depth and dead letters across all workers"""
+        return {
+            **self.stats_counters,
+            'workers': len(self._tasks),
+            'pending': await self.jobs.count_documents({"status": "pending"}),
+            'running': await self.jobs.count_documents({"status": "running"}),
+            'dead_letter': await self.dead_letters.count_documents({})
+        }
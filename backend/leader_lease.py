@@ -0,0 +1,70 @@
+"""
+Single-leader leases backed by MongoDB
+Periodic tasks that must not run in every uvicorn worker take a named lease document in the
+"leases" collection; only the holder runs them, and another worker takes over once it expires.
+"""
+import os
+import socket
+import logging
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+LEADER_LEASE_SECONDS = float(os.environ.get('LEADER_LEASE_SECONDS', '600'))
+
+
+class LeaderLease:
+    """
+    Named lease ({"_id": name, "holder", "expires_at", "renewed_at"}) held by at most one process.
+
+    The holder renews it with acquire() more often than ttl_seconds; if it stops (crash, shutdown),
+    the lease expires and the next process to call acquire() becomes the leader.
+    """
+
+    def __init__(self, collection, name: str, ttl_seconds: float = LEADER_LEASE_SECONDS):
+        """
+        Args:
+            collection: Motor collection holding lease documents (db.leases)
+            name: Lease name, one per periodic task
+            ttl_seconds: How long a lease lasts without renewal
+        """
+        self.leases = collection
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.held = False
+
+    async def acquire(self) -> bool:
+        """Take the lease if it is free or expired, or renew it if this process holds it"""
+        now = datetime.now(timezone.utc)
+        try:
+            # When another process holds a live lease the filter matches nothing and the upsert hits the _id
+            await self.leases.find_one_and_update(
+                {"_id": self.name, "$or": [{"holder": self.holder}, {"expires_at": {"$lte": now.isoformat()}}]},
+                {"$set": {
+                    "holder": self.holder,
+                    "expires_at": (now + timedelta(seconds=self.ttl_seconds)).isoformat(),
+                    "renewed_at": now.isoformat()
+                }},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            if self.held:
+                logger.warning(f"Lost the '{self.name}' lease")
+            self.held = False
+            return False
+
+        if not self.held:
+            logger.info(f"Acquired the '{self.name}' lease as {self.holder}")
+        self.held = True
+        return True
+
+    async def release(self):
+        """Give up the lease so another process can take it without waiting for expiry"""
+        if self.held:
+            await self.leases.delete_one({"_id": self.name, "holder": self.holder})
+            self.held = False
@@ -0,0 +1,64 @@
+"""
+Order number allocation
+Each worker reserves a block of order numbers with one atomic counter update and hands them out
+from memory, so most orders need no database round trip and numbers never repeat across workers
+"""
+import os
+import asyncio
+import logging
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Numbers reserved per refill; unused numbers of a block are skipped when the worker restarts
+ORDER_ID_BLOCK_SIZE = int(os.environ.get('ORDER_ID_BLOCK_SIZE', '20'))
+
+
+class OrderIdAllocator:
+    """
+    Block allocator over the order_counter document ({"_id": "order_id", "sequence_value": last reserved}).
+
+    Numbers are unique across workers but only increase within a worker: two workers hand out
+    from different blocks, and restarts leave gaps.
+    """
+
+    def __init__(self, counters, counter_id: str = "order_id", first_id: int = 300,
+                 block_size: int = ORDER_ID_BLOCK_SIZE):
+        """
+        Args:
+            counters: Motor collection holding the counter document (db.order_counter)
+            counter_id: _id of the counter document
+            first_id: First order number when the counter does not exist yet
+            block_size: Numbers reserved per refill
+        """
+        self.counters = counters
+        self.counter_id = counter_id
+        self.first_id = first_id
+        self.block_size = max(1, block_size)
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def _reserve_block(self):
+        # One upserting pipeline update: creates the counter at first_id - 1 if missing, then adds the block
+        counter = await self.counters.find_one_and_update(
+            {"_id": self.counter_id},
+            [{"$set": {"sequence_value": {
+                "$add": [{"$ifNull": ["$sequence_value", self.first_id - 1]}, self.block_size]
+            }}}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._end = int(counter["sequence_value"]) + 1
+        self._next = self._end - self.block_size
+        logger.info(f"Reserved order numbers {self._next}-{self._end - 1}")
+
+    async def next_id(self) -> str:
+        """Next order number, as the string stored in order_id"""
+        async with self._lock:
+            if self._next >= self._end:
+                await self._reserve_block()
+            order_id = self._next
+            self._next += 1
+        return str(order_id)
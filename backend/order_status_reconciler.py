@@ -0,0 +1,179 @@
+"""
+Orders sheet <-> MongoDB reconciliation
+Copies order statuses that staff change in the "Orders" sheet into db.orders, and queues the
+sheet append again for paid orders whose row was never written
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from google_sheets_integration import SheetsExecutor, get_sheets_executor, get_worksheet
+from job_queue import JobQueue
+from leader_lease import LeaderLease
+
+logger = logging.getLogger(__name__)
+
+ORDER_RECONCILE_INTERVAL_SECONDS = float(os.environ.get('ORDER_RECONCILE_INTERVAL_SECONDS', '300'))
+
+# Orders younger than this may still have their first append_order_row job running, so they are left alone
+ORDER_RECONCILE_APPEND_GRACE_SECONDS = float(os.environ.get('ORDER_RECONCILE_APPEND_GRACE_SECONDS', '900'))
+
+# Order ID is column A and Status column K of the Orders sheet (see ORDERS_SHEET_HEADERS)
+ORDER_ID_RANGE = 'A2:A'
+ORDER_STATUS_RANGE = 'K2:K'
+
+
+class OrderStatusReconciler:
+    """
+    Periodic sync between the Orders worksheet and db.orders.
+
+    Statuses flow from the sheet to Mongo only: staff and drivers change them in the sheet, and
+    the app never changes an order's status in Mongo after writing the row.
+
+    Rows flow from Mongo to the sheet through the durable append_order_row job. Only orders still
+    flagged sheet_appended: False are considered, so rows staff deleted are not added back, and
+    orders that already have an append job queued are skipped.
+    """
+
+    def __init__(self, orders_collection, job_queue: JobQueue, lease: Optional[LeaderLease] = None,
+                 worksheet_name: str = "Orders", executor: Optional[SheetsExecutor] = None,
+                 append_grace_seconds: float = ORDER_RECONCILE_APPEND_GRACE_SECONDS):
+        """
+        Args:
+            orders_collection: Motor collection holding paid orders (db.orders)
+            job_queue: Queue running the append_order_row jobs
+            lease: Leader lease; run_forever only reconciles while holding it (every process if omitted)
+            worksheet_name: Worksheet holding the orders
+            executor: Pool for the blocking sheet read (the process-wide one if omitted)
+            append_grace_seconds: Minimum order age before a missing row is queued again
+        """
+        self.orders = orders_collection
+        self.job_queue = job_queue
+        self.lease = lease
+        self.worksheet_name = worksheet_name
+        self.executor = executor
+        self.append_grace_seconds = append_grace_seconds
+        self.last_run: Optional[Dict] = None
+        self.stats_counters = {
+            'runs': 0,
+            'statuses_updated': 0,
+            'rows_marked': 0,
+            'appends_queued': 0,
+            'errors': 0
+        }
+
+    def _read_statuses(self, sheet_url: str) -> List[Tuple[str, str]]:
+        """(order ID, status) for every sheet row, read with one batch_get of columns A and K"""
+        worksheet = get_worksheet(sheet_url, self.worksheet_name, fallback_to_first=False)
+        if worksheet is None:
+            return []
+        order_ids, statuses = worksheet.batch_get([ORDER_ID_RANGE, ORDER_STATUS_RANGE])
+        rows = []
+        for position, id_row in enumerate(order_ids):
+            if not id_row or str(id_row[0]).strip() == "":
+                continue
+            status_row = statuses[position] if position < len(statuses) else []
+            rows.append((str(id_row[0]).strip(), str(status_row[0]).strip() if status_row else ""))
+        return rows
+
+    async def reconcile(self, sheet_url: str) -> Dict:
+        """
+        Run one reconciliation pass.
+
+        Returns:
+            Dict with sheet_rows, statuses_updated, rows_marked and appends_queued
+        """
+        executor = self.executor or get_sheets_executor()
+        rows = await executor.run(self._read_statuses, sheet_url)
+        sheet_statuses = {order_id: status for order_id, status in rows}
+
+        # Sheet -> Mongo: staff edits to the Status column win
+        now = datetime.now(timezone.utc).isoformat()
+        operations = []
+        statuses_updated = rows_marked = 0
+        async for order in self.orders.find(
+            {"order_id": {"$in": list(sheet_statuses)}},
+            {"_id": 0, "order_id": 1, "status": 1, "sheet_appended": 1}
+        ):
+            status = sheet_statuses.get(order["order_id"])
+            changes = {}
+            if status and status != order.get("status"):
+                changes["status"] = status
+                statuses_updated += 1
+            if order.get("sheet_appended") is False:
+                # The row was written but its job did not get to flag the order
+                changes["sheet_appended"] = True
+                rows_marked += 1
+            if changes:
+                operations.append(UpdateOne({"order_id": order["order_id"]}, {"$set": {**changes, "updated_at": now}}))
+        if operations:
+            await self.orders.bulk_write(operations, ordered=False)
+
+        # Mongo -> sheet: paid orders whose row never got written
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.append_grace_seconds)).isoformat()
+        missing = [
+            order["order_id"]
+            async for order in self.orders.find(
+                {"order_id": {"$nin": list(sheet_statuses)}, "sheet_appended": False, "created_at": {"$lt": cutoff}},
+                {"_id": 0, "order_id": 1}
+            )
+        ]
+        queued = {
+            job["payload"]["order_id"]
+            async for job in self.job_queue.jobs.find(
+                {"type": "append_order_row", "payload.order_id": {"$in": missing}}, {"payload.order_id": 1}
+            )
+        }
+        appends = [
+            ("append_order_row", {"order_id": order_id, "sheet_url": sheet_url})
+            for order_id in missing if order_id not in queued
+        ]
+        await self.job_queue.enqueue_many(appends)
+
+        result = {
+            'sheet_rows': len(rows),
+            'statuses_updated': statuses_updated,
+            'rows_marked': rows_marked,
+            'appends_queued': len(appends),
+            'finished_at': now
+        }
+        self.stats_counters['runs'] += 1
+        self.stats_counters['statuses_updated'] += statuses_updated
+        self.stats_counters['rows_marked'] += rows_marked
+        self.stats_counters['appends_queued'] += len(appends)
+        self.last_run = result
+        if statuses_updated or appends:
+            logger.info(f"Reconciled orders: {statuses_updated} status update(s), {len(appends)} append(s) queued")
+        return result
+
+    async def run_forever(self, sheet_url: str, interval: float = ORDER_RECONCILE_INTERVAL_SECONDS):
+        """Reconcile every `interval` seconds until cancelled, only while holding the leader lease"""
+        try:
+            while True:
+                try:
+                    if self.lease is None or await self.lease.acquire():
+                        await self.reconcile(sheet_url)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.stats_counters['errors'] += 1
+                    logger.error(f"Order reconciliation failed: {str(e)}")
+                await asyncio.sleep(interval)
+        finally:
+            if self.lease is not None:
+                try:
+                    await self.lease.release()
+                except Exception as e:
+                    logger.warning(f"Could not release the order reconciliation lease: {str(e)}")
+
+    def stats(self) -> Dict:
+        """Run counters and the outcome of the last pass for monitoring"""
+        return {
+            **self.stats_counters,
+            'leader': self.lease is None or self.lease.held,
+            'last_run': self.last_run
+        }
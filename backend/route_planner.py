@@ -0,0 +1,187 @@
+"""
+Delivery route planner
+Builds multi-stop delivery trips from Washington Gardens using nearest-neighbour construction and 2-opt improvement
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+# Straight-line distance understates road distance; this is the usual urban detour factor
+ROAD_DETOUR_FACTOR = 1.35
+
+
+def estimate_road_distance_km(lat_a, lng_a, lat_b, lng_b) -> np.ndarray:
+    """Haversine distance x detour factor; arguments broadcast like NumPy arrays (degrees)"""
+    lat_a, lng_a, lat_b, lng_b = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lat_a, lng_a, lat_b, lng_b))
+    a = np.sin((lat_b - lat_a) / 2) ** 2 + np.cos(lat_a) * np.cos(lat_b) * np.sin((lng_b - lng_a) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))) * ROAD_DETOUR_FACTOR
+
+
+def build_distance_matrix(depot_distances_km: List[float],
+                          locations: List[Optional[Tuple[float, float]]],
+                          measured_legs_km: Optional[np.ndarray] = None) -> Tuple[np.ndarray, int]:
+    """
+    Build a symmetric (n + 1) x (n + 1) distance matrix in km with the depot at index 0.
+
+    Depot legs use the real road distances from DistanceService. Stop-to-stop legs use the
+    measured road distances when known; otherwise they are estimated from coordinates
+    (haversine x detour factor), and when a stop has no known location the leg falls back
+    to the via-depot upper bound d(0, i) + d(0, j).
+
+    Args:
+        depot_distances_km: Road distance from the depot to each stop
+        locations: (lat, lng) of each stop, or None if unknown
+        measured_legs_km: Optional n x n road distances between stops (row to column), NaN where unknown
+
+    Returns:
+        (matrix, number of stop-to-stop legs that had to use the upper bound)
+    """
+    n = len(depot_distances_km)
+    depot = np.asarray(depot_distances_km, dtype=np.float64)
+    matrix = np.zeros((n + 1, n + 1), dtype=np.float64)
+    matrix[0, 1:] = depot
+    matrix[1:, 0] = depot
+
+    # Via-depot upper bound for every pair, then overwrite pairs with known coordinates
+    stop_matrix = depot[:, None] + depot[None, :]
+    upper_bound = np.ones((n, n), dtype=bool)
+
+    known = np.array([location is not None for location in locations], dtype=bool)
+    if known.any():
+        coords = np.array([location if location is not None else (0.0, 0.0) for location in locations])
+        estimated = estimate_road_distance_km(coords[:, None, 0], coords[:, None, 1], coords[None, :, 0], coords[None, :, 1])
+        both_known = known[:, None] & known[None, :]
+        stop_matrix = np.where(both_known, estimated, stop_matrix)
+        upper_bound &= ~both_known
+
+    if measured_legs_km is not None:
+        # 2-opt assumes d(i, j) == d(j, i): average the two directions, or use the one that was measured
+        measured = np.asarray(measured_legs_km, dtype=np.float64)
+        reverse = measured.T
+        measured = np.where(np.isnan(measured), reverse, np.where(np.isnan(reverse), measured, (measured + reverse) / 2))
+        stop_matrix = np.where(np.isnan(measured), stop_matrix, measured)
+        upper_bound &= np.isnan(measured)
+
+    np.fill_diagonal(stop_matrix, 0.0)
+    matrix[1:, 1:] = stop_matrix
+
+    estimated_legs = int(np.triu(upper_bound, k=1).sum())
+    return matrix, estimated_legs
+
+
+def plan_trips(matrix: np.ndarray, demands: List[int], capacity: int) -> List[List[int]]:
+    """
+    Split stops into capacity-limited trips with nearest-neighbour construction.
+    Each trip starts and ends at the depot (index 0); stop indices are 1-based.
+    A stop whose demand alone exceeds capacity gets a trip of its own.
+    """
+    n = len(demands)
+    demand = np.asarray(demands, dtype=np.int64)
+    unvisited = np.ones(n + 1, dtype=bool)
+    unvisited[0] = False
+    trips = []
+
+    while unvisited.any():
+        trip = []
+        load = 0
+        current = 0
+        while True:
+            candidates = unvisited.copy()
+            candidates[1:] &= demand + load <= capacity
+            if not trip and not candidates.any():
+                # Nothing fits an empty vehicle: the nearest oversized order goes out on its own
+                candidates = unvisited.copy()
+            if not candidates.any():
+                break
+            distances = np.where(candidates, matrix[current], np.inf)
+            nearest = int(np.argmin(distances))
+            trip.append(nearest)
+            load += int(demand[nearest - 1])
+            unvisited[nearest] = False
+            current = nearest
+            if load >= capacity:
+                break
+        trips.append(trip)
+
+    return trips
+
+
+def two_opt(trip: List[int], matrix: np.ndarray, max_passes: int = 50) -> List[int]:
+    """
+    Improve a single depot-to-depot trip by reversing segments while that shortens it.
+    The inner loop over segment ends is vectorized with NumPy.
+    """
+    if len(trip) < 3:
+        return trip
+
+    route = np.array([0] + trip + [0], dtype=np.int64)
+    last = len(route) - 1
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, last - 1):
+            j = np.arange(i + 1, last)
+            delta = (matrix[route[i - 1], route[j]] + matrix[route[i], route[j + 1]]
+                     - matrix[route[i - 1], route[i]] - matrix[route[j], route[j + 1]])
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                k = int(j[best])
+                route[i:k + 1] = route[i:k + 1][::-1]
+                improved = True
+        if not improved:
+            break
+
+    return route[1:-1].tolist()
+
+
+def trip_distance(trip: List[int], matrix: np.ndarray) -> float:
+    """Total km of a depot-to-depot trip"""
+    if not trip:
+        return 0.0
+    route = np.array([0] + trip + [0], dtype=np.int64)
+    return float(matrix[route[:-1], route[1:]].sum())
+
+
+def assign_trips_to_drivers(trip_lengths: List[float], drivers: int) -> List[List[int]]:
+    """Longest-trip-first assignment so each driver ends up with a similar total distance"""
+    assignments = [[] for _ in range(max(1, drivers))]
+    loads = [0.0] * len(assignments)
+    for trip_index in sorted(range(len(trip_lengths)), key=lambda index: -trip_lengths[index]):
+        driver = loads.index(min(loads))
+        assignments[driver].append(trip_index)
+        loads[driver] += trip_lengths[trip_index]
+    return assignments
+
+
+def plan_delivery_routes(matrix: np.ndarray, demands: List[int], capacity: int, drivers: int = 1) -> Dict:
+    """
+    Plan trips for every stop and spread them across drivers.
+
+    Args:
+        matrix: Distance matrix from build_distance_matrix (depot at index 0)
+        demands: Bags per stop
+        capacity: Bags a vehicle can carry per trip
+        drivers: Number of drivers/vehicles
+
+    Returns:
+        Dict with 'drivers' (list of trips, each a list of 0-based stop indices with its km)
+        and 'total_distance_km'
+    """
+    trips = [two_opt(trip, matrix) for trip in plan_trips(matrix, demands, capacity)]
+    lengths = [trip_distance(trip, matrix) for trip in trips]
+    assignments = assign_trips_to_drivers(lengths, drivers)
+
+    return {
+        'drivers': [
+            [
+                {'stops': [stop - 1 for stop in trips[index]], 'distance_km': round(lengths[index], 2)}
+                for index in trip_indexes
+            ]
+            for trip_indexes in assignments
+        ],
+        'total_distance_km': round(sum(lengths), 2)
+    }
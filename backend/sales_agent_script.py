@@ -3,6 +3,8 @@ Sales Agent Script and FAQ for Ice Solutions
 Contains the sales script and frequently asked questions for the AI sales agent.
 """
 
+from delivery_zones import get_address_matcher
+
 SALES_AGENT_SCRIPT = """
 Hello! This is Marcus from Ice Solutions. We provide premium party ice delivery for businesses and events in Kingston, Jamaica.
 
@@ -105,9 +107,7 @@ def calculate_price(bags, delivery_address=""):
     discounted_total = subtotal - discount_amount
     
     # Calculate delivery fee
-    is_washington_gardens = any(area in delivery_address.lower() for area in [
-        'washington gardens', 'washington garden', 'wash gardens', 'wash garden'
-    ])
+    is_washington_gardens = get_address_matcher().is_washington_gardens(delivery_address)
     
     if is_washington_gardens or bags >= 20:
         delivery_fee = 0.0
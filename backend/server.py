@@ -3,21 +3,40 @@ from fastapi.responses import Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteMany, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 import json
 import asyncio
+import threading
 import gspread
+from cachetools import LRUCache, TTLCache
 from urllib.parse import quote, unquote
 from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
-from google_sheets_integration import GoogleSheetsLeadManager
-from email_service import send_notification_confirmation_email
+from google_sheets_integration import (
+    AsyncGoogleSheetsLeadManager, OrdersSheetIndex, SheetsExecutorFullError, get_append_queue, get_sheets_executor, get_worksheet,
+    invalidate_worksheet, is_open_lead, lead_row, lead_row_hash, normalize_phone, order_row, sheets_rate_limit_stats,
+    ORDERS_SHEET_HEADERS, NOTIFICATIONS_SHEET_HEADERS
+)
+from email_service import send_notification_confirmation_email, send_order_confirmation_email
 from sales_agent_script import SALES_AGENT_SCRIPT, SALES_FAQ
+from distance_cache import DistanceCache, normalize_address
+from distance_service import DistanceService
+from distance_matrix_store import DistanceMatrixStore
+from circuit_breaker import CircuitBreaker
+from route_planner import build_distance_matrix, plan_delivery_routes
+from order_status_reconciler import ORDER_RECONCILE_INTERVAL_SECONDS, OrderStatusReconciler
+from job_queue import JobQueue
+from leader_lease import LeaderLease
+from order_id_allocator import OrderIdAllocator
+from stripe_payment_reconciler import STRIPE_RECONCILE_INTERVAL_SECONDS, StripePaymentReconciler, transaction_payment_status
+from delivery_zones import ZoneIndex, get_address_matcher
 
 
 ROOT_DIR = Path(__file__).parent
@@ -28,6 +47,131 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Route cache shared by every DistanceService in this process (LRU + MongoDB TTL collection)
+distance_cache = DistanceCache(db.distance_cache)
+
+# Neighbourhood distance bands, loaded once so known areas never need a Routes API call
+delivery_zone_index = ZoneIndex.load()
+
+# Trips after repeated Routes API failures so checkout falls back to flat-fee estimates
+routes_api_breaker = CircuitBreaker(
+    "google_routes",
+    failure_threshold=int(os.environ.get('ROUTES_BREAKER_FAILURE_THRESHOLD', '5')),
+    reset_timeout=float(os.environ.get('ROUTES_BREAKER_RESET_SECONDS', '30'))
+)
+
+# Memory-mapped distances for frequent destinations, shared by every uvicorn worker on this host
+try:
+    distance_matrix_store: Optional[DistanceMatrixStore] = DistanceMatrixStore()
+except OSError as e:
+    logging.getLogger(__name__).error(f"Distance matrix store unavailable: {str(e)}")
+    distance_matrix_store = None
+
+# App-lifetime DistanceService (keep-alive Routes API client), created on startup
+distance_service: Optional[DistanceService] = None
+
+def get_distance_service() -> DistanceService:
+    """Return the shared DistanceService, creating it on first use"""
+    global distance_service
+    if distance_service is None:
+        distance_service = DistanceService(
+            cache=distance_cache,
+            zone_index=delivery_zone_index,
+            breaker=routes_api_breaker,
+            matrix_store=distance_matrix_store
+        )
+    return distance_service
+
+# Order ID -> row index over the Orders sheet for the tracking page fallback
+orders_sheet_index = OrdersSheetIndex()
+
+# Order numbers (starting from 300) handed out from per-worker blocks of db.order_counter
+order_id_allocator = OrderIdAllocator(db.order_counter)
+
+# Durable post-payment work (confirmation email, Orders sheet row) so the Stripe webhook answers at once
+job_queue = JobQueue(db)
+
+# Pulls staff status edits from the Orders sheet into db.orders and queues missing rows again, in one process at a time
+order_reconciler = OrderStatusReconciler(
+    db.orders, job_queue,
+    lease=LeaderLease(db.leases, "order_status_reconciler", ttl_seconds=2 * ORDER_RECONCILE_INTERVAL_SECONDS)
+)
+
+async def send_order_email_job(payload: dict):
+    """Job: send the order confirmation email once per order"""
+    order = await db.orders.find_one({"order_id": payload["order_id"]}, {"_id": 0})
+    if not order or order.get("email_sent") or not order.get("customer_email"):
+        return
+    
+    # SMTP is blocking, keep it off the event loop
+    sent = await asyncio.to_thread(
+        send_order_confirmation_email,
+        customer_email=order["customer_email"],
+        customer_name=order.get("customer_name", ""),
+        order_id=order["order_id"],
+        quantity=order.get("quantity", 0),
+        subtotal=order.get("subtotal", 0),
+        discount=order.get("discount", 0),
+        total=order.get("total", 0),
+        delivery_address=order.get("delivery_address", ""),
+        tracking_url=payload.get("tracking_url", "")
+    )
+    if not sent:
+        if not os.getenv('SENDER_PASSWORD'):
+            # Email is not configured here; retrying would not change that
+            return
+        raise RuntimeError(f"Order confirmation email for Order #{order['order_id']} was not sent")
+    
+    await db.orders.update_one({"order_id": order["order_id"]}, {"$set": {"email_sent": True}})
+    logger.info(f"Order confirmation email sent for Order #{order['order_id']}")
+
+# Serializes check-then-append within this process, so a retry waits for an earlier append still running
+order_append_lock = threading.Lock()
+
+def append_order_to_sheet(sheet_url: str, order_id: str, row: list) -> bool:
+    """
+    Blocking, idempotent append of one order row to the Orders worksheet (run on the Sheets executor)
+    
+    The Order ID column is read right before appending, so an append that timed out for its
+    caller but still completed on its thread is found instead of written twice.
+    
+    Returns:
+        True if the row was appended, False if the order was already in the sheet
+    """
+    worksheet = get_worksheet(sheet_url, "Orders", headers=ORDERS_SHEET_HEADERS)
+    if worksheet is None:
+        raise ValueError("Orders worksheet is not available")
+    try:
+        with order_append_lock:
+            order_ids = worksheet.batch_get(['A:A'])[0]
+            if any(cells and str(cells[0]).strip() == order_id for cells in order_ids):
+                return False
+            worksheet.append_row(row)
+            return True
+    except Exception:
+        invalidate_worksheet(sheet_url, "Orders")
+        raise
+
+async def append_order_row_job(payload: dict):
+    """Job: add the order's row to the Orders sheet once per order"""
+    order = await db.orders.find_one({"order_id": payload["order_id"]}, {"_id": 0})
+    if not order or order.get("sheet_appended"):
+        return
+    
+    # Wait as long as the job lease allows rather than the short request timeout
+    appended = await get_sheets_executor().run(
+        append_order_to_sheet, payload["sheet_url"], order["order_id"], order_row(order),
+        timeout=job_queue.lease_seconds
+    )
+    await db.orders.update_one({"order_id": order["order_id"]}, {"$set": {"sheet_appended": True}})
+    if appended:
+        logger.info(f"Order #{order['order_id']} added to Google Sheets")
+    else:
+        logger.info(f"Order #{order['order_id']} was already in Google Sheets")
+
+job_queue.register("send_order_email", send_order_email_job)
+job_queue.register("append_order_row", append_order_row_job)
+
 # Stripe configuration
 STRIPE_API_KEY = os.environ['STRIPE_API_KEY']
 
@@ -288,10 +432,7 @@ async def create_quote(quote_input: QuoteCreate, background_tasks: BackgroundTas
     base_price = recommended_bags * 350.00  # JMD $350 per 10lb bag
     
     # Calculate delivery fee based on address
-    customer_address = quote_input.customerInfo.address.lower()
-    is_washington_gardens = any(area in customer_address for area in [
-        'washington gardens', 'washington garden', 'wash gardens', 'wash garden'
-    ])
+    is_washington_gardens = get_address_matcher().is_washington_gardens(quote_input.customerInfo.address)
     
     if is_washington_gardens or recommended_bags >= 20:
         delivery_fee = 0.0  # Free delivery to Washington Gardens OR 20+ bags anywhere
@@ -345,10 +486,7 @@ async def create_scheduled_quote(quote_input: QuoteCreate):
     base_price = recommended_bags * 350.00
     
     # Calculate delivery fee based on address
-    customer_address = quote_input.customerInfo.address.lower()
-    is_washington_gardens = any(area in customer_address for area in [
-        'washington gardens', 'washington garden', 'wash gardens', 'wash garden'
-    ])
+    is_washington_gardens = get_address_matcher().is_washington_gardens(quote_input.customerInfo.address)
     
     if is_washington_gardens or recommended_bags >= 20:
         delivery_fee = 0.0  # Free delivery to Washington Gardens OR 20+ bags anywhere
@@ -401,10 +539,7 @@ async def create_quote_no_callback(quote_input: QuoteCreate):
     base_price = recommended_bags * 350.00
     
     # Calculate delivery fee based on address
-    customer_address = quote_input.customerInfo.address.lower()
-    is_washington_gardens = any(area in customer_address for area in [
-        'washington gardens', 'washington garden', 'wash gardens', 'wash garden'
-    ])
+    is_washington_gardens = get_address_matcher().is_washington_gardens(quote_input.customerInfo.address)
     
     if is_washington_gardens or recommended_bags >= 20:
         delivery_fee = 0.0  # Free delivery to Washington Gardens OR 20+ bags anywhere
@@ -568,26 +703,69 @@ async def create_checkout_session(checkout_req: CheckoutRequest, origin_url: str
         logging.error(f"Error creating checkout session: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create checkout session: {str(e)}")
 
+# Shared client for status lookups (checkout sessions are still created with a per-request webhook URL)
+stripe_status_checkout: Optional[StripeCheckout] = None
+
+def get_stripe_checkout() -> StripeCheckout:
+    """Return the shared StripeCheckout used for status lookups, creating it on first use"""
+    global stripe_status_checkout
+    if stripe_status_checkout is None:
+        stripe_status_checkout = StripeCheckout(api_key=STRIPE_API_KEY, webhook_url="")
+    return stripe_status_checkout
+
+# Paid and expired sessions never change again and are cached for good; pending ones are
+# re-checked with Stripe at most every CHECKOUT_STATUS_PENDING_TTL_SECONDS while the confirmation page polls
+CHECKOUT_STATUS_PENDING_TTL_SECONDS = float(os.environ.get('CHECKOUT_STATUS_PENDING_TTL_SECONDS', '5'))
+final_checkout_statuses: LRUCache = LRUCache(maxsize=10000)
+pending_checkout_statuses: TTLCache = TTLCache(maxsize=10000, ttl=CHECKOUT_STATUS_PENDING_TTL_SECONDS)
+
+def is_final_checkout_status(status) -> bool:
+    return status.payment_status == "paid" or status.status == "expired"
+
+async def fetch_checkout_status(session_id: str, use_pending_cache: bool = True) -> Tuple[Any, bool]:
+    """
+    Checkout session status, from the cache when possible
+    
+    Args:
+        session_id: Stripe checkout session ID
+        use_pending_cache: Accept a recently fetched non-final status
+        
+    Returns:
+        (status, True if it was fetched from Stripe just now)
+    """
+    status = final_checkout_statuses.get(session_id)
+    if status is None and use_pending_cache:
+        status = pending_checkout_statuses.get(session_id)
+    if status is not None:
+        return status, False
+    
+    status = await get_stripe_checkout().get_checkout_status(session_id)
+    if is_final_checkout_status(status):
+        final_checkout_statuses[session_id] = status
+        pending_checkout_statuses.pop(session_id, None)
+    else:
+        pending_checkout_statuses[session_id] = status
+    return status, True
+
 @api_router.get("/checkout/status/{session_id}")
 async def get_checkout_status(session_id: str):
     """Get the status of a checkout session"""
     try:
-        # Initialize Stripe checkout
-        stripe_checkout = StripeCheckout(api_key=STRIPE_API_KEY, webhook_url="")
-        
-        # Get checkout status from Stripe
-        status = await stripe_checkout.get_checkout_status(session_id)
-        
-        # Update payment transaction in database
-        await db.payment_transactions.update_one(
-            {"session_id": session_id},
-            {
-                "$set": {
-                    "payment_status": status.payment_status,
-                    "updated_at": datetime.now(timezone.utc).isoformat()
+        status, fetched = await fetch_checkout_status(session_id)
+        
+        # Update payment transaction in database, only when Stripe was asked and the status moved.
+        # Same mapping as the Stripe reconciler, so both record e.g. "expired" for an expired session
+        if fetched:
+            payment_status = transaction_payment_status(status)
+            await db.payment_transactions.update_one(
+                {"session_id": session_id, "payment_status": {"$ne": payment_status}},
+                {
+                    "$set": {
+                        "payment_status": payment_status,
+                        "updated_at": datetime.now(timezone.utc).isoformat()
+                    }
                 }
-            }
-        )
+            )
         
         return status
         
@@ -595,15 +773,118 @@ async def get_checkout_status(session_id: str):
         logging.error(f"Error getting checkout status: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get checkout status: {str(e)}")
 
+# Checkout session ID -> order ID for sessions this worker has already turned into orders.
+# Stripe retries and the confirmation page re-posting the webhook are answered from here.
+processed_checkout_sessions: TTLCache = TTLCache(maxsize=10000, ttl=24 * 3600)
+
+def order_tracking_url(order_id: str) -> str:
+    """Customer-facing tracking page for an order"""
+    frontend_url = os.environ.get('FRONTEND_URL') or os.environ.get('REACT_APP_BACKEND_URL', 'http://localhost:3000')
+    if '/api' in frontend_url:
+        frontend_url = frontend_url.split('/api')[0]
+    return f"{frontend_url}/track-order?id={order_id}"
+
+async def create_paid_order(session_id: str, payment_status: str, metadata: Dict[str, str],
+                            amount_total: int) -> Tuple[str, bool]:
+    """
+    Create the order for a paid checkout session exactly once
+    
+    A repeated call finds the existing order before an order number is allocated. The unique index
+    on orders.session_id makes the insert the final check: a concurrent call for the same session
+    gets DuplicateKeyError and returns the existing order.
+    
+    Args:
+        session_id: Stripe checkout session ID
+        payment_status: Payment status to record on the transaction
+        metadata: Checkout session metadata set by create_checkout_session
+        amount_total: Amount paid in cents
+        
+    Returns:
+        (order ID, True if this call created the order)
+    """
+    existing_order = await db.orders.find_one({"session_id": session_id}, {"_id": 0, "order_id": 1})
+    if existing_order:
+        logger.info(f"Order already processed for session {session_id}, Order ID: {existing_order.get('order_id')}")
+        processed_checkout_sessions[session_id] = existing_order.get('order_id')
+        return existing_order.get('order_id'), False
+    
+    # Generate Order ID (starting from 300)
+    order_id = await order_id_allocator.next_id()
+    
+    # Extract order details
+    customer_email = metadata.get("customer_email", "")
+    discount_amount = float(metadata.get("discount_amount", "0"))
+    
+    # Calculate amounts
+    total_paid = amount_total / 100  # Convert from cents
+    subtotal = total_paid + discount_amount
+    
+    now = datetime.now(timezone.utc).isoformat()
+    order_doc = {
+        "order_id": order_id,
+        "session_id": session_id,
+        "customer_name": metadata.get("customer_name", ""),
+        "customer_email": customer_email,
+        "customer_phone": metadata.get("customer_phone", ""),
+        "business_name": metadata.get("business_name", ""),
+        "quantity": int(metadata.get("bags", "0")),
+        "subtotal": subtotal,
+        "discount": discount_amount,
+        "total": total_paid,
+        "delivery_address": metadata.get("delivery_address", ""),
+        "status": "Planning",
+        "is_bulk_order": metadata.get("is_bulk_order") == "True",
+        "bulk_order_tier": metadata.get("bulk_order_tier", ""),
+        "email_sent": False,  # Will be updated after email sent
+        "sheet_appended": False,  # Set by the append_order_row job
+        "created_at": now,
+        "updated_at": now
+    }
+    try:
+        await db.orders.insert_one(order_doc)
+    except DuplicateKeyError:
+        existing_order = await db.orders.find_one({"session_id": session_id}, {"_id": 0, "order_id": 1})
+        logger.info(f"Order already processed for session {session_id}, Order ID: {existing_order.get('order_id')}")
+        processed_checkout_sessions[session_id] = existing_order.get('order_id')
+        return existing_order.get('order_id'), False
+    processed_checkout_sessions[session_id] = order_id
+    logger.info(f"Order #{order_id} saved to MongoDB for session {session_id}")
+    
+    # Update payment transaction
+    await db.payment_transactions.update_one(
+        {"session_id": session_id},
+        {
+            "$set": {
+                "payment_status": payment_status,
+                "order_id": order_id,
+                "updated_at": now
+            }
+        }
+    )
+    
+    # Confirmation email and Sheets row run as durable jobs (retried, then dead-lettered)
+    jobs = []
+    if customer_email:
+        jobs.append(("send_order_email", {"order_id": order_id, "tracking_url": order_tracking_url(order_id)}))
+    sheet_url = os.environ.get('GOOGLE_SHEETS_URL')
+    if sheet_url:
+        jobs.append(("append_order_row", {"order_id": order_id, "sheet_url": sheet_url}))
+    await job_queue.enqueue_many(jobs)
+    logger.info(f"Order #{order_id} post-payment jobs queued: {', '.join(job_type for job_type, _ in jobs) or 'none'}")
+    return order_id, True
+
+# Catches paid checkouts whose webhook never arrived (and updates stale transaction statuses)
+stripe_payment_reconciler = StripePaymentReconciler(
+    db.payment_transactions, db.orders, create_paid_order, STRIPE_API_KEY,
+    lease=LeaderLease(db.leases, "stripe_payment_reconciler", ttl_seconds=2 * STRIPE_RECONCILE_INTERVAL_SECONDS)
+)
+
 @api_router.post("/webhook/stripe")
 async def stripe_webhook(request: dict):
     """Handle Stripe webhook events"""
     try:
         logger.info(f"Webhook received: {request}")
         
-        # Initialize Stripe checkout
-        stripe_checkout = StripeCheckout(api_key=STRIPE_API_KEY, webhook_url="")
-        
         # Process webhook
         session_id = request.get("session_id")
         payment_status = request.get("payment_status")
@@ -611,178 +892,27 @@ async def stripe_webhook(request: dict):
         logger.info(f"Processing webhook - Session: {session_id}, Status: {payment_status}")
         
         if session_id and payment_status == "paid":
-            # Check if order already exists for this session to prevent duplicates
-            existing_order = await db.orders.find_one({"session_id": session_id})
-            if existing_order:
-                logger.info(f"Order already processed for session {session_id}, Order ID: {existing_order.get('order_id')}")
-                return {"status": "success", "message": "Order already processed", "order_id": existing_order.get('order_id')}
+            # Duplicates (Stripe retries, the confirmation page re-posting) stop here
+            order_id = processed_checkout_sessions.get(session_id)
+            if order_id is None:
+                existing_order = await db.orders.find_one({"session_id": session_id}, {"_id": 0, "order_id": 1})
+                if existing_order:
+                    order_id = processed_checkout_sessions[session_id] = existing_order.get('order_id')
+            if order_id is not None:
+                return {"status": "success", "message": "Order already processed", "order_id": order_id}
             
             # Get session details and generate order
             try:
-                status = await stripe_checkout.get_checkout_status(session_id)
+                # A cached paid status (e.g. from the confirmation page's last poll) is reused; pending is re-checked
+                status, _ = await fetch_checkout_status(session_id, use_pending_cache=False)
                 if status and status.metadata:
-                    # Generate Order ID (starting from 300)
-                    order_counter = await db.order_counter.find_one({"_id": "order_id"})
-                    if not order_counter:
-                        # Initialize counter at 300
-                        await db.order_counter.insert_one({"_id": "order_id", "sequence_value": 300})
-                        order_id = "300"
-                    else:
-                        # Increment counter
-                        result = await db.order_counter.find_one_and_update(
-                            {"_id": "order_id"},
-                            {"$inc": {"sequence_value": 1}},
-                            return_document=True
-                        )
-                        order_id = str(result["sequence_value"])
-                    
-                    # Extract order details
-                    customer_name = status.metadata.get("customer_name", "")
-                    customer_email = status.metadata.get("customer_email", "")
-                    customer_phone = status.metadata.get("customer_phone", "")
-                    business_name = status.metadata.get("business_name", "")
-                    bags = status.metadata.get("bags", "0")
-                    delivery_address = status.metadata.get("delivery_address", "")
-                    discount_amount = float(status.metadata.get("discount_amount", "0"))
-                    is_bulk_order = status.metadata.get("is_bulk_order") == "True"
-                    bulk_order_tier = status.metadata.get("bulk_order_tier", "")
-                    
-                    # Calculate amounts
-                    total_paid = status.amount_total / 100  # Convert from cents
-                    subtotal = total_paid + discount_amount
-                    
-                    # Create tracking URL
-                    frontend_url = os.environ.get('FRONTEND_URL') or os.environ.get('REACT_APP_BACKEND_URL', 'http://localhost:3000')
-                    if '/api' in frontend_url:
-                        frontend_url = frontend_url.split('/api')[0]
-                    tracking_url = f"{frontend_url}/track-order?id={order_id}"
-                    logger.info(f"Generated tracking URL: {tracking_url}")
-                    
-                    # SAVE TO MONGODB FIRST (before email/sheets) to prevent duplicate processing
-                    order_doc = {
-                        "order_id": order_id,
-                        "session_id": session_id,
-                        "customer_name": customer_name,
-                        "customer_email": customer_email,
-                        "customer_phone": customer_phone,
-                        "business_name": business_name,
-                        "quantity": int(bags),
-                        "subtotal": subtotal,
-                        "discount": discount_amount,
-                        "total": total_paid,
-                        "delivery_address": delivery_address,
-                        "status": "Planning",
-                        "is_bulk_order": is_bulk_order,
-                        "bulk_order_tier": bulk_order_tier,
-                        "email_sent": False,  # Will be updated after email sent
-                        "created_at": datetime.now(timezone.utc).isoformat(),
-                        "updated_at": datetime.now(timezone.utc).isoformat()
-                    }
-                    await db.orders.insert_one(order_doc)
-                    logger.info(f"Order #{order_id} saved to MongoDB FIRST")
-                    
-                    # Update payment transaction
-                    await db.payment_transactions.update_one(
-                        {"session_id": session_id},
-                        {
-                            "$set": {
-                                "payment_status": payment_status,
-                                "order_id": order_id,
-                                "updated_at": datetime.now(timezone.utc).isoformat()
-                            }
-                        }
+                    order_id, created = await create_paid_order(
+                        session_id, payment_status, status.metadata, status.amount_total
                     )
+                    if not created:
+                        return {"status": "success", "message": "Order already processed", "order_id": order_id}
                     
-                    # Send confirmation email
-                    from email_service import send_order_confirmation_email
-                    if customer_email:
-                        send_order_confirmation_email(
-                            customer_email=customer_email,
-                            customer_name=customer_name,
-                            order_id=order_id,
-                            quantity=int(bags),
-                            subtotal=subtotal,
-                            discount=discount_amount,
-                            total=total_paid,
-                            delivery_address=delivery_address,
-                            tracking_url=tracking_url
-                        )
-                        # Mark email as sent in MongoDB
-                        await db.orders.update_one(
-                            {"session_id": session_id},
-                            {"$set": {"email_sent": True}}
-                        )
-                        logger.info(f"Order confirmation email sent for Order #{order_id}")
-                    
-                    # Save to Google Sheets (after email, so if this fails, email was still sent)
-                    sheet_url = os.environ.get('GOOGLE_SHEETS_URL')
-                    if sheet_url:
-                        sheets_manager = GoogleSheetsLeadManager(
-                            credentials_json_path=os.environ.get('GOOGLE_SHEETS_CREDENTIALS_PATH', '/app/backend/google_sheets_credentials.json')
-                        )
-                        
-                        if sheets_manager.authenticate():
-                            # Use the authenticated client
-                            spreadsheet = sheets_manager.client.open_by_url(sheet_url)
-                            
-                            # Get or create "Orders" worksheet
-                            orders_sheet = None
-                            try:
-                                # Try to get the Orders sheet (case-insensitive search)
-                                all_worksheets = spreadsheet.worksheets()
-                                for ws in all_worksheets:
-                                    if ws.title.lower() == "orders":
-                                        orders_sheet = ws
-                                        break
-                                
-                                if not orders_sheet:
-                                    raise Exception("Orders sheet not found")
-                                    
-                            except:
-                                # If Orders sheet doesn't exist, create it
-                                try:
-                                    orders_sheet = spreadsheet.add_worksheet(title="Orders", rows="1000", cols="20")
-                                    # Add headers
-                                    headers = [
-                                        "Order ID", "Customer Name", "Phone", "Email", "Business Name",
-                                        "Quantity", "Subtotal", "Discount", "Total", "Delivery Address",
-                                        "Status", "Order Date", "Payment Session", "Notes"
-                                    ]
-                                    orders_sheet.append_row(headers)
-                                    logger.info("Created new Orders sheet with headers")
-                                except Exception as create_error:
-                                    # Sheet might already exist, try to get it again
-                                    logger.error(f"Error creating Orders sheet: {create_error}")
-                                    all_worksheets = spreadsheet.worksheets()
-                                    for ws in all_worksheets:
-                                        if ws.title.lower() == "orders":
-                                            orders_sheet = ws
-                                            break
-                            
-                            if orders_sheet:
-                                # Prepare order data
-                                order_data = [
-                                    order_id,
-                                    customer_name,
-                                    customer_phone,
-                                    customer_email,
-                                    business_name or "",
-                                    bags,
-                                    f"${subtotal:.2f}",
-                                    f"${discount_amount:.2f}" if discount_amount > 0 else "$0.00",
-                                    f"${total_paid:.2f}",
-                                    delivery_address,
-                                    "Planning",  # Initial status
-                                    datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-                                    session_id,
-                                    f"Bulk Order: {bulk_order_tier}" if is_bulk_order else "Regular Order"
-                                ]
-                                
-                                orders_sheet.append_row(order_data)
-                                logger.info(f"Order #{order_id} saved to Google Sheets")
-                            else:
-                                logger.error("Could not find or create Orders sheet")
-                    
+                    return {"status": "success", "order_id": order_id}
             except Exception as e:
                 logger.error(f"Error processing order after payment: {str(e)}")
                 import traceback
@@ -855,6 +985,108 @@ async def get_order(order_id: str):
     
     return order
 
+async def refresh_lead_phone_index(sheet_url: str, records: List[dict]):
+    """
+    Mirror the leads sheet's phone -> row mapping into db.lead_phone_index
+    
+    Entries are keyed by (sheet_url, E.164 phone); only rows that moved are rewritten, and
+    phones no longer in the sheet are dropped. Row numbers are hints: the sheet write checks
+    the row's Phone cell first. Call notes are not mirrored, they are read from the sheet at
+    write time so edits made there are never overwritten.
+    """
+    entries = {}
+    for record in records:
+        key = normalize_phone(record['phone'])
+        if key:
+            # Same precedence as the sheet's own lookup: the first row with a phone wins
+            entries.setdefault(key, {"row_number": record['row_number'], "phone": record['phone']})
+    
+    docs = await db.lead_phone_index.find(
+        {"sheet_url": sheet_url}, {"e164": 1, "row_number": 1, "phone": 1}
+    ).to_list(None)
+    known = {doc['e164']: doc for doc in docs if doc.get('e164')}
+    operations = [
+        UpdateOne({"sheet_url": sheet_url, "e164": key}, {"$set": entry}, upsert=True)
+        for key, entry in entries.items()
+        if {field: known.get(key, {}).get(field) for field in entry} != entry
+    ]
+    stale = [doc['_id'] for doc in docs if doc.get('e164') not in entries]
+    if stale:
+        operations.append(DeleteMany({"_id": {"$in": stale}}))
+    
+    if operations:
+        await db.lead_phone_index.bulk_write(operations, ordered=False)
+
+async def reindex_lead_phone_index(sheets_manager: AsyncGoogleSheetsLeadManager, sheet_url: str):
+    """Rebuild the mirror from the sheet, after a write found rows had moved"""
+    records = await sheets_manager.get_lead_records(sheet_url=sheet_url)
+    if records:
+        await refresh_lead_phone_index(sheet_url, records)
+        logger.info(f"Re-indexed {len(records)} lead rows after rows moved in the sheet")
+
+async def lookup_lead_rows(sheet_url: str, phones: List[str]) -> dict:
+    """E.164 phone -> mirrored sheet row number for the given phone numbers, in one query"""
+    keys = list({normalize_phone(phone) for phone in phones})
+    return {
+        doc['e164']: doc['row_number']
+        async for doc in db.lead_phone_index.find({"sheet_url": sheet_url, "e164": {"$in": keys}})
+    }
+
+async def update_sheet_lead_rows(sheets_manager: AsyncGoogleSheetsLeadManager, sheet_url: str,
+                                 updates: List[dict]) -> dict:
+    """
+    Write lead updates to the sheet using the mirrored rows as hints
+    
+    Returns:
+        Dict of phone -> sheet row updated (None if not found), as update_lead_statuses
+    """
+    rows = await lookup_lead_rows(sheet_url, [update['phone'] for update in updates])
+    outcome = await sheets_manager.update_lead_statuses([
+        {**update, "row_number": rows.get(normalize_phone(update['phone']))} for update in updates
+    ])
+    # A hint that did not match the sheet means rows were sorted, inserted or deleted by hand
+    if any(rows.get(normalize_phone(phone)) not in (None, row) for phone, row in outcome.items()):
+        try:
+            await reindex_lead_phone_index(sheets_manager, sheet_url)
+        except (asyncio.TimeoutError, SheetsExecutorFullError) as e:
+            # The write went through; the mirror catches up on the next sync
+            logger.warning(f"Lead phone index re-index skipped, Sheets is busy: {str(e) or type(e).__name__}")
+    return outcome
+
+async def write_lead_updates_to_sheet(updates: List[dict]) -> Tuple[int, Optional[str]]:
+    """
+    Write lead call results to the configured leads sheet, after the MongoDB update
+    
+    A busy Sheets executor must not fail a request whose MongoDB write already went through, so
+    executor timeouts and rejections are logged and reported as a warning. A timed-out call may
+    still finish on its thread (appending the call notes), so that warning tells the client not to resend.
+    
+    Args:
+        updates: Dicts with phone, status, call_notes and result
+        
+    Returns:
+        (number of sheet rows updated, warning message or None)
+    """
+    sheet_url = os.getenv('GOOGLE_SHEETS_URL')
+    if not sheet_url:
+        return 0, None
+    
+    sheets_manager = AsyncGoogleSheetsLeadManager()
+    try:
+        if not await sheets_manager.connect_to_sheet(sheet_url):
+            return 0, None
+        call_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        outcome = await update_sheet_lead_rows(sheets_manager, sheet_url, [
+            {**update, "call_date": call_date} for update in updates
+        ])
+    except asyncio.TimeoutError:
+        logger.warning(f"Google Sheets update for {len(updates)} lead(s) timed out and may still complete")
+        return 0, "Saved in the database, but Google Sheets is slow and may update late. Do not resend this update."
+    except SheetsExecutorFullError as e:
+        logger.warning(f"Google Sheets update for {len(updates)} lead(s) rejected: {str(e)}")
+        return 0, "Saved in the database, but Google Sheets is busy and was not updated."
+    return sum(1 for updated in outcome.values() if updated), None
+
 # Lead Management Endpoints (for Sales Agent)
 @api_router.get("/leads/sync")
 async def sync_leads_from_sheets(sheet_url: str = None):
@@ -866,7 +1098,7 @@ async def sync_leads_from_sheets(sheet_url: str = None):
     """
     try:
         # Initialize Google Sheets manager
-        sheets_manager = GoogleSheetsLeadManager()
+        sheets_manager = AsyncGoogleSheetsLeadManager()
         
         # Get sheet URL from environment if not provided
         if not sheet_url:
@@ -879,8 +1111,11 @@ async def sync_leads_from_sheets(sheet_url: str = None):
                 "setup_required": True
             }
         
-        # Get leads from sheet
-        leads = sheets_manager.get_leads(sheet_url=sheet_url)
+        # Get leads from sheet; every row feeds the phone index, open leads are synced
+        records = await sheets_manager.get_lead_records(sheet_url=sheet_url)
+        if records:
+            await refresh_lead_phone_index(sheet_url, records)
+        leads = [lead for lead in records if is_open_lead(lead)]
         
         if not leads:
             return {
@@ -890,21 +1125,39 @@ async def sync_leads_from_sheets(sheet_url: str = None):
                 "leads": []
             }
         
-        # Store leads in database for tracking
-        for lead in leads:
-            # Check if lead already exists
-            existing = await db.leads.find_one({"phone": lead['phone']})
-            if not existing:
-                lead['created_at'] = datetime.now(timezone.utc).isoformat()
-                lead['last_updated'] = datetime.now(timezone.utc).isoformat()
-                lead['call_attempts'] = 0
-                lead['last_call_date'] = None
-                await db.leads.insert_one(lead)
+        # Delta sync: only rows whose content hash changed since the last sync are written
+        hashes = [lead_row_hash(lead) for lead in leads]
+        phones = list({lead['phone'] for lead in leads})
+        known = {
+            doc['phone']: doc.get('sheet_hash')
+            async for doc in db.leads.find({"phone": {"$in": phones}}, {"_id": 0, "phone": 1, "sheet_hash": 1})
+        }
+        
+        now = datetime.now(timezone.utc).isoformat()
+        operations = []
+        for lead, sheet_hash in zip(leads, hashes):
+            if known.get(lead['phone']) == sheet_hash:
+                continue
+            # Row numbers live in lead_phone_index only; they change whenever rows move
+            fields = {field: value for field, value in lead.items() if field != 'row_number'}
+            operations.append(UpdateOne(
+                {"phone": lead['phone']},
+                {
+                    "$set": {**fields, "sheet_hash": sheet_hash, "last_updated": now},
+                    "$unset": {"row_number": ""},
+                    "$setOnInsert": {"created_at": now, "call_attempts": 0, "last_call_date": None}
+                },
+                upsert=True
+            ))
+        
+        if operations:
+            await db.leads.bulk_write(operations, ordered=False)
         
         return {
             "status": "success",
             "message": f"Successfully synced {len(leads)} leads",
             "leads_count": len(leads),
+            "changed_count": len(operations),
             "leads": leads
         }
         
@@ -1031,8 +1284,6 @@ async def scrape_and_add_leads(count: int = 10, areas: Optional[List[str]] = Non
                 "leads_added": 0
             }
         
-        # Initialize Google Sheets manager
-        sheets_manager = GoogleSheetsLeadManager()
         sheet_url = os.getenv('GOOGLE_SHEETS_URL')
         
         leads_added = 0
@@ -1042,21 +1293,17 @@ async def scrape_and_add_leads(count: int = 10, areas: Optional[List[str]] = Non
         # Add leads to Google Sheets and database
         for lead in leads:
             try:
-                # Add to Google Sheets if configured
+                # Queue for Google Sheets if configured
                 if sheet_url:
-                    try:
-                        if sheets_manager.connect_to_sheet(sheet_url):
-                            sheets_manager.add_lead(
-                                business_name=lead['business_name'],
-                                phone=lead['phone'],
-                                address=lead['address'],
-                                business_type=lead['type'],
-                                area=lead['area'],
-                                status='New'
-                            )
-                            leads_added_to_sheets += 1
-                    except Exception as sheet_error:
-                        logger.warning(f"Could not add to Google Sheets: {str(sheet_error)}")
+                    get_append_queue().enqueue(sheet_url, "Sheet1", lead_row(
+                        business_name=lead['business_name'],
+                        phone=lead['phone'],
+                        address=lead['address'],
+                        business_type=lead['type'],
+                        area=lead['area'],
+                        status='New'
+                    ))
+                    leads_added_to_sheets += 1
                 
                 # Check if lead already exists in database
                 existing = await db.leads.find_one({"phone": lead['phone']})
@@ -1106,6 +1353,52 @@ async def scrape_and_add_leads(count: int = 10, areas: Optional[List[str]] = Non
         logger.error(f"Error scraping leads: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to scrape leads: {str(e)}")
 
+class LeadCallResult(BaseModel):
+    phone: str
+    status: str
+    call_notes: str = ""
+    result: str = ""
+
+class BulkLeadUpdateRequest(BaseModel):
+    updates: List[LeadCallResult]
+
+@api_router.post("/leads/update/bulk")
+async def update_lead_call_results(request: BulkLeadUpdateRequest):
+    """
+    Update many leads after a calling session: one MongoDB bulk write and one Sheets batch update
+    """
+    try:
+        if not request.updates:
+            return {"status": "success", "updated": 0, "sheet_updated": 0}
+        
+        now = datetime.now(timezone.utc).isoformat()
+        operations = []
+        for update in request.updates:
+            update_data = {"status": update.status, "last_updated": now}
+            if update.call_notes:
+                update_data["call_notes"] = update.call_notes
+            if update.result:
+                update_data["result"] = update.result
+            operations.append(UpdateOne({"phone": update.phone}, {"$set": update_data}))
+        db_result = await db.leads.bulk_write(operations, ordered=False)
+        
+        sheet_updated, sheet_warning = await write_lead_updates_to_sheet(
+            [update.model_dump() for update in request.updates]
+        )
+        
+        response = {
+            "status": "success",
+            "updated": db_result.modified_count,
+            "sheet_updated": sheet_updated
+        }
+        if sheet_warning:
+            response["sheet_warning"] = sheet_warning
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error updating leads: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to update leads: {str(e)}")
+
 @api_router.post("/leads/update/{phone}")
 async def update_lead_call_result(phone: str, status: str, call_notes: str = "", result: str = ""):
     """
@@ -1135,29 +1428,28 @@ async def update_lead_call_result(phone: str, status: str, call_notes: str = "",
         )
         
         # Update in Google Sheets if configured
-        sheets_manager = GoogleSheetsLeadManager()
-        sheet_url = os.getenv('GOOGLE_SHEETS_URL')
-        
-        if sheet_url and sheets_manager.connect_to_sheet(sheet_url):
-            call_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-            sheets_manager.update_lead_status(
-                phone=phone,
-                status=status,
-                call_date=call_date,
-                call_notes=call_notes,
-                result=result
-            )
+        sheet_updated, sheet_warning = await write_lead_updates_to_sheet([{
+            "phone": phone,
+            "status": status,
+            "call_notes": call_notes,
+            "result": result
+        }])
         
         if db_result.modified_count > 0:
-            return {
+            response = {
                 "status": "success",
-                "message": f"Lead {phone} updated successfully"
+                "message": f"Lead {phone} updated successfully",
+                "sheet_updated": sheet_updated > 0
             }
         else:
-            return {
+            response = {
                 "status": "warning",
-                "message": f"No lead found with phone {phone} or no changes made"
+                "message": f"No lead found with phone {phone} or no changes made",
+                "sheet_updated": sheet_updated > 0
             }
+        if sheet_warning:
+            response["sheet_warning"] = sheet_warning
+        return response
         
     except Exception as e:
         logger.error(f"Error updating lead: {str(e)}")
@@ -1338,23 +1630,18 @@ async def subscribe_to_notification(notification: NotificationRequest, backgroun
             notification.product_size
         )
         
-        # Try to save to Google Sheets if configured
-        try:
-            sheets_manager = GoogleSheetsLeadManager()
-            sheet_url = os.getenv('GOOGLE_SHEETS_NOTIFICATIONS_URL')
-            
-            if sheet_url and sheets_manager.connect_to_sheet(sheet_url, "Notifications"):
-                sheets_manager.add_lead(
-                    name=notification.email,
-                    phone="N/A",
-                    email=notification.email,
-                    status="Waiting",
-                    notes=f"Wants notification for {notification.product_size} {notification.product_name}"
-                )
-                logger.info(f"Saved notification to Google Sheets for {notification.email}")
-        except Exception as e:
-            logger.warning(f"Could not save to Google Sheets: {str(e)}")
-            # Continue even if Google Sheets fails - we have it in database
+        # Queue for Google Sheets if configured - the database copy above is authoritative
+        sheet_url = os.getenv('GOOGLE_SHEETS_NOTIFICATIONS_URL')
+        if sheet_url:
+            get_append_queue().enqueue(sheet_url, "Notifications", [
+                notification.email,
+                notification.product_name,
+                notification.product_size,
+                "Waiting",
+                notification_doc["subscribed_at"],
+                f"Wants notification for {notification.product_size} {notification.product_name}"
+            ], headers=NOTIFICATIONS_SHEET_HEADERS)
+            logger.info(f"Queued notification for Google Sheets for {notification.email}")
         
         return {
             "status": "success",
@@ -1761,6 +2048,30 @@ class DistanceCalculationResponse(BaseModel):
     duration_text: str
     is_washington_gardens: bool
     free_delivery_reason: Optional[str] = None
+    zone: Optional[str] = None
+    is_estimate: bool = False
+
+class BatchDeliveryFeeItem(BaseModel):
+    destination_address: str
+    bags: int = 0
+
+class BatchDeliveryFeeRequest(BaseModel):
+    items: List[BatchDeliveryFeeItem]
+
+class BatchDeliveryFeeResult(BaseModel):
+    destination_address: str
+    bags: int = 0
+    distance_miles: Optional[float] = None
+    delivery_fee: Optional[float] = None
+    distance_text: Optional[str] = None
+    duration_text: Optional[str] = None
+    is_washington_gardens: bool = False
+    free_delivery_reason: Optional[str] = None
+    zone: Optional[str] = None
+    is_estimate: bool = False
+    error: Optional[str] = None
+
+MAX_BATCH_DELIVERY_FEE_ITEMS = 500
 
 @api_router.post("/calculate-delivery-fee", response_model=DistanceCalculationResponse)
 async def calculate_delivery_fee(request: DistanceCalculationRequest):
@@ -1772,17 +2083,15 @@ async def calculate_delivery_fee(request: DistanceCalculationRequest):
     - 20+ bags: FREE anywhere in Kingston
     """
     try:
-        from distance_service import DistanceService
-        
-        distance_service = DistanceService()
+        service = get_distance_service()
         
         if request.bags > 0:
-            result = distance_service.calculate_delivery_fee_for_order(
+            result = await service.calculate_delivery_fee_for_order_async(
                 request.destination_address,
                 request.bags
             )
         else:
-            result = distance_service.calculate_distance(request.destination_address)
+            result = await service.calculate_distance_async(request.destination_address)
         
         return DistanceCalculationResponse(**result)
         
@@ -1792,6 +2101,235 @@ async def calculate_delivery_fee(request: DistanceCalculationRequest):
         logger.error(f"Distance calculation error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to calculate distance")
 
+@api_router.post("/calculate-delivery-fee/batch", response_model=List[BatchDeliveryFeeResult])
+async def calculate_delivery_fee_batch(request: BatchDeliveryFeeRequest):
+    """
+    Calculate delivery fees for many addresses at once (lead lists, bulk-order sheets).
+    Same rules as /calculate-delivery-fee; addresses that cannot be routed come back
+    with an error instead of failing the whole batch.
+    """
+    if len(request.items) > MAX_BATCH_DELIVERY_FEE_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {MAX_BATCH_DELIVERY_FEE_ITEMS} addresses")
+    
+    try:
+        service = get_distance_service()
+        results = await service.calculate_delivery_fees_for_orders(
+            [(item.destination_address, item.bags) for item in request.items]
+        )
+        
+        return [
+            BatchDeliveryFeeResult(destination_address=item.destination_address, bags=item.bags, **result)
+            for item, result in zip(request.items, results)
+        ]
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Batch distance calculation error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to calculate distances")
+
+# One worker warms the shared cache per deploy; the lease is kept after the warm-up so workers
+# starting later within the lease do not repeat it
+distance_warmup_lease = LeaderLease(
+    db.leases, "distance_cache_warmup",
+    ttl_seconds=float(os.environ.get('DISTANCE_WARMUP_LEASE_SECONDS', '3600'))
+)
+
+async def warm_distance_cache():
+    """
+    Pre-resolve delivery addresses from past orders, bulk orders and leads so
+    returning customers get cached fees right after a deploy.
+    Only the worker holding the warm-up lease runs it.
+    """
+    try:
+        if not await distance_warmup_lease.acquire():
+            logger.info("Distance cache warm-up is running in another worker, skipping")
+            return
+    except Exception as e:
+        logger.error(f"Could not take the distance cache warm-up lease: {str(e)}")
+        return
+    completed = False
+    try:
+        service = get_distance_service()
+        addresses = set()
+        addresses.update(await db.orders.distinct("delivery_address"))
+        addresses.update(await db.bulk_orders.distinct("deliveryAddress"))
+        addresses.update(await db.leads.distinct("address"))
+        
+        max_addresses = int(os.environ.get('DISTANCE_WARMUP_MAX_ADDRESSES', '2000'))
+        addresses = [address for address in addresses if isinstance(address, str)][:max_addresses]
+        
+        logger.info(f"Warming distance cache with {len(addresses)} historical addresses")
+        summary = await service.warm_up(addresses)
+        logger.info(f"Distance cache warm-up complete: {summary}")
+        completed = True
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Distance cache warm-up failed: {str(e)}")
+    finally:
+        if not completed:
+            # Let another worker pick the warm-up up instead of waiting for the lease to expire
+            try:
+                await distance_warmup_lease.release()
+            except Exception as e:
+                logger.warning(f"Could not release the distance cache warm-up lease: {str(e)}")
+
+@api_router.get("/admin/distance-stats")
+async def get_distance_stats():
+    """Route cache, upstream coalescing and circuit breaker counters for monitoring/alerting"""
+    stats = {"cache": distance_cache.stats()}
+    if distance_service is not None:
+        stats["singleflight"] = distance_service.singleflight_stats()
+        stats["degraded"] = distance_service.degraded_mode_stats()
+    else:
+        stats["degraded"] = {"breaker": routes_api_breaker.stats()}
+    if distance_matrix_store is not None:
+        stats["matrix_store"] = distance_matrix_store.stats()
+    return stats
+
+@api_router.get("/admin/sheets-stats")
+async def get_sheets_stats():
+    """Google Sheets queue/executor depth, quota limiter wait time and retry counters for monitoring"""
+    return {
+        "append_queue": get_append_queue().stats(),
+        "executor": get_sheets_executor().stats(),
+        "orders_index": orders_sheet_index.stats(),
+        "rate_limit": sheets_rate_limit_stats(),
+        "order_reconciler": order_reconciler.stats()
+    }
+
+@api_router.get("/admin/jobs-stats")
+async def get_jobs_stats():
+    """Background job queue depth, dead letters and this worker's counters"""
+    return await job_queue.stats()
+
+@api_router.post("/admin/orders/reconcile")
+async def reconcile_orders_with_sheet():
+    """Run one Orders sheet <-> MongoDB status reconciliation pass now"""
+    sheet_url = os.environ.get('GOOGLE_SHEETS_URL')
+    if not sheet_url:
+        raise HTTPException(status_code=400, detail="Google Sheets not configured")
+    try:
+        return await order_reconciler.reconcile(sheet_url)
+    except Exception as e:
+        logger.error(f"Order reconciliation failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Order reconciliation failed: {str(e)}")
+
+@api_router.get("/admin/payments/reconcile")
+async def get_payment_reconciliation_stats():
+    """Counters and last result of the Stripe payment reconciliation"""
+    return stripe_payment_reconciler.stats()
+
+@api_router.post("/admin/payments/reconcile")
+async def reconcile_payments_with_stripe():
+    """Run one Stripe checkout sessions -> payment_transactions/orders reconciliation pass now"""
+    try:
+        return await stripe_payment_reconciler.reconcile()
+    except Exception as e:
+        logger.error(f"Stripe payment reconciliation failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Stripe payment reconciliation failed: {str(e)}")
+
+class RoutePlanRequest(BaseModel):
+    date: Optional[str] = None  # YYYY-MM-DD (UTC), defaults to today
+    bags_per_trip: int = 40
+    drivers: int = 1
+
+@api_router.post("/admin/delivery-routes/plan")
+async def plan_daily_delivery_routes(plan_request: RoutePlanRequest):
+    """
+    Plan the day's delivery runs for paid orders still in "Planning".
+    Depot distances come from DistanceService (zone index / cache, one matrix call for
+    new addresses) and stop-to-stop distances from stops x stops matrix calls; stops are
+    grouped into trips of at most bags_per_trip bags, ordered with nearest-neighbour + 2-opt
+    and spread across drivers. estimated_legs counts legs Google could not measure, which
+    fall back to the via-depot upper bound.
+    """
+    try:
+        if plan_request.bags_per_trip <= 0 or plan_request.drivers <= 0:
+            raise HTTPException(status_code=400, detail="bags_per_trip and drivers must be positive")
+        
+        day = plan_request.date or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        try:
+            next_day = (datetime.fromisoformat(day) + timedelta(days=1)).strftime("%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="date must be in YYYY-MM-DD format")
+        
+        orders = await db.orders.find(
+            {"status": "Planning", "created_at": {"$gte": day, "$lt": next_day}},
+            {"_id": 0}
+        ).to_list(1000)
+        
+        service = get_distance_service()
+        addresses = [order.get("delivery_address", "") for order in orders]
+        
+        # Resolves anything not yet cached in a single upstream matrix request
+        await service.calculate_distances_batch(addresses)
+        
+        stops = []
+        unroutable = []
+        for order, address in zip(orders, addresses):
+            route = await service.lookup_route(address)
+            if route is None:
+                unroutable.append({"order_id": order.get("order_id"), "delivery_address": address})
+            else:
+                stops.append((order, route))
+        
+        if not stops:
+            return {"date": day, "stops": 0, "drivers": [], "total_distance_km": 0.0, "unroutable": unroutable}
+        
+        # Batch-resolved routes carry no coordinates, so stop-to-stop legs are measured as well
+        # (pairs already in the shared matrix store cost nothing)
+        measured_legs = await service.measure_stop_legs([order.get("delivery_address", "") for order, _ in stops])
+        matrix, estimated_legs = build_distance_matrix(
+            [route["distance_meters"] / 1000 for _, route in stops],
+            [(route["lat"], route["lng"]) if "lat" in route else None for _, route in stops],
+            measured_legs
+        )
+        demands = [int(order.get("quantity", 0) or 0) for order, _ in stops]
+        plan = plan_delivery_routes(matrix, demands, plan_request.bags_per_trip, plan_request.drivers)
+        
+        drivers = []
+        for driver_number, trips in enumerate(plan["drivers"], start=1):
+            drivers.append({
+                "driver": driver_number,
+                "trips": [
+                    {
+                        "trip": trip_number,
+                        "distance_km": trip["distance_km"],
+                        "bags": sum(demands[index] for index in trip["stops"]),
+                        "stops": [
+                            {
+                                "order_id": stops[index][0].get("order_id"),
+                                "customer_name": stops[index][0].get("customer_name"),
+                                "customer_phone": stops[index][0].get("customer_phone"),
+                                "delivery_address": stops[index][0].get("delivery_address"),
+                                "quantity": demands[index]
+                            }
+                            for index in trip["stops"]
+                        ]
+                    }
+                    for trip_number, trip in enumerate(trips, start=1)
+                ]
+            })
+        
+        return {
+            "date": day,
+            "stops": len(stops),
+            "drivers": drivers,
+            "total_distance_km": plan["total_distance_km"],
+            "estimated_legs": estimated_legs,
+            "unroutable": unroutable
+        }
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error planning delivery routes: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to plan delivery routes: {str(e)}")
+
 @api_router.post("/chat")
 async def chat_with_frosty(chat_input: ChatMessage):
     """
@@ -1922,55 +2460,14 @@ IMPORTANT:
 @api_router.post("/leads/chat")
 async def create_chat_lead(lead: ChatLead):
     """
-    Save lead information from chat widget to Google Sheets
+    Save lead information from chat widget to MongoDB and queue it for Google Sheets
     """
     try:
-        # Prepare lead data for Google Sheets
         sheet_url = os.environ.get('GOOGLE_SHEETS_URL')
         if not sheet_url:
             raise HTTPException(status_code=500, detail="Google Sheets not configured")
         
-        # Initialize Google Sheets manager
-        sheets_manager = GoogleSheetsLeadManager(
-            credentials_json_path=os.environ.get('GOOGLE_SHEETS_CREDENTIALS_PATH', '/app/backend/google_sheets_credentials.json')
-        )
-        
-        if not sheets_manager.authenticate():
-            raise HTTPException(status_code=500, detail="Failed to authenticate with Google Sheets")
-        
-        # Connect to spreadsheet and get the first sheet or "Leads" tab
-        spreadsheet = sheets_manager.client.open_by_url(sheet_url)
-        
-        # Try to find "Leads" sheet, otherwise use first sheet
-        leads_sheet = None
-        try:
-            leads_sheet = spreadsheet.worksheet("Leads")
-        except:
-            # If "Leads" doesn't exist, try first sheet
-            all_sheets = spreadsheet.worksheets()
-            if all_sheets:
-                leads_sheet = all_sheets[0]
-            else:
-                raise HTTPException(status_code=500, detail="No sheets found in spreadsheet")
-        
-        # Add lead to sheet
-        # Expected columns: Name | Phone | Email | Business Name | Product Interest | Quantity | Inquiry | Date | Source
-        lead_data = [
-            lead.name,
-            lead.phone,
-            lead.email,
-            lead.businessName or "",
-            lead.productInterest,
-            str(lead.quantity),
-            lead.inquiry or "Chat inquiry",
-            datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-            "Website Chat"
-        ]
-        
-        leads_sheet.append_row(lead_data)
-        logger.info(f"Chat lead saved to Google Sheets: {lead.name} - {lead.phone}")
-        
-        # Also save to MongoDB for internal tracking
+        # Save to MongoDB first - it is the system of record, the sheet row is written behind
         lead_doc = {
             "id": str(uuid.uuid4()),
             "name": lead.name,
@@ -1990,6 +2487,23 @@ async def create_chat_lead(lead: ChatLead):
         await db.chat_leads.insert_one(lead_doc)
         logger.info(f"Chat lead saved to MongoDB: {lead.name}")
         
+        # "Leads" sheet, or the first sheet if there is none
+        # Expected columns: Name | Phone | Email | Business Name | Product Interest | Quantity | Inquiry | Date | Source
+        lead_data = [
+            lead.name,
+            lead.phone,
+            lead.email,
+            lead.businessName or "",
+            lead.productInterest,
+            str(lead.quantity),
+            lead.inquiry or "Chat inquiry",
+            datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "Website Chat"
+        ]
+        
+        get_append_queue().enqueue(sheet_url, "Leads", lead_data)
+        logger.info(f"Chat lead queued for Google Sheets: {lead.name} - {lead.phone}")
+        
         return {
             "success": True,
             "message": "Lead information saved successfully"
@@ -2018,43 +2532,14 @@ class BulkOrder(BaseModel):
 @api_router.post("/bulk-orders")
 async def create_bulk_order(order: BulkOrder):
     """
-    Save bulk order information to Google Sheets for follow-up
+    Save bulk order information to MongoDB and queue it for Google Sheets follow-up
     """
     try:
-        # Prepare order data for Google Sheets
         sheet_url = os.environ.get('GOOGLE_SHEETS_URL')
         if not sheet_url:
             raise HTTPException(status_code=500, detail="Google Sheets not configured")
         
-        # Initialize Google Sheets manager
-        sheets_manager = GoogleSheetsLeadManager(
-            credentials_json_path=os.environ.get('GOOGLE_SHEETS_CREDENTIALS_PATH', '/app/backend/google_sheets_credentials.json')
-        )
-        
-        if not sheets_manager.authenticate():
-            raise HTTPException(status_code=500, detail="Failed to authenticate with Google Sheets")
-        
-        if not sheets_manager.connect_to_sheet(sheet_url):
-            raise HTTPException(status_code=500, detail="Failed to connect to Google Sheets")
-        
-        # Add bulk order to sheet
-        # Expected columns: Name | Phone | Email | Business Name | Product Interest | Quantity | Inquiry | Date | Source
-        order_data = [
-            order.name,
-            order.phone,
-            order.email,
-            order.businessName or "",
-            f"Bulk Order ({order.tier} bags)",
-            str(order.quantity),
-            f"Delivery: {order.deliveryAddress} on {order.deliveryDate}. Discount: {order.discountPercent}%. Total: JMD ${order.subtotal:.2f}. Notes: {order.notes}",
-            datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-            "Bulk Order Form"
-        ]
-        
-        sheets_manager.sheet.append_row(order_data)
-        logger.info(f"Bulk order saved to Google Sheets: {order.name} - {order.quantity} bags")
-        
-        # Also save to MongoDB for internal tracking
+        # Save to MongoDB first - it is the system of record, the sheet row is written behind
         order_doc = {
             "id": str(uuid.uuid4()),
             "name": order.name,
@@ -2079,6 +2564,22 @@ async def create_bulk_order(order: BulkOrder):
         await db.bulk_orders.insert_one(order_doc)
         logger.info(f"Bulk order saved to MongoDB: {order.name}")
         
+        # Expected columns: Name | Phone | Email | Business Name | Product Interest | Quantity | Inquiry | Date | Source
+        order_data = [
+            order.name,
+            order.phone,
+            order.email,
+            order.businessName or "",
+            f"Bulk Order ({order.tier} bags)",
+            str(order.quantity),
+            f"Delivery: {order.deliveryAddress} on {order.deliveryDate}. Discount: {order.discountPercent}%. Total: JMD ${order.subtotal:.2f}. Notes: {order.notes}",
+            datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "Bulk Order Form"
+        ]
+        
+        get_append_queue().enqueue(sheet_url, "Sheet1", order_data)
+        logger.info(f"Bulk order queued for Google Sheets: {order.name} - {order.quantity} bags")
+        
         return {
             "success": True,
             "message": "Bulk order request received successfully"
@@ -2105,45 +2606,31 @@ async def get_order_status(order_id: str):
         if not sheet_url:
             raise HTTPException(status_code=404, detail="Order not found")
         
-        sheets_manager = GoogleSheetsLeadManager(
-            credentials_json_path=os.environ.get('GOOGLE_SHEETS_CREDENTIALS_PATH', '/app/backend/google_sheets_credentials.json')
-        )
+        try:
+            record = await orders_sheet_index.lookup(sheet_url, order_id)
+        except Exception as e:
+            logger.error(f"Failed to read Orders sheet: {str(e)}")
+            record = None
         
-        if sheets_manager.authenticate():
-            spreadsheet = sheets_manager.client.open_by_url(sheet_url)
-            
-            try:
-                orders_sheet = spreadsheet.worksheet("Orders")
-                # Get all records
-                records = orders_sheet.get_all_records()
-                
-                # Find order by ID
-                for record in records:
-                    if str(record.get("Order ID")) == order_id:
-                        # Return order data
-                        return {
-                            "order_id": record.get("Order ID"),
-                            "customer_name": record.get("Customer Name"),
-                            "customer_phone": record.get("Phone"),
-                            "customer_email": record.get("Email"),
-                            "business_name": record.get("Business Name", ""),
-                            "quantity": int(record.get("Quantity", 0)),
-                            "subtotal": record.get("Subtotal", "$0.00"),
-                            "discount": record.get("Discount", "$0.00"),
-                            "total": record.get("Total", "$0.00"),
-                            "delivery_address": record.get("Delivery Address"),
-                            "status": record.get("Status", "Planning"),
-                            "order_date": record.get("Order Date"),
-                            "notes": record.get("Notes", "")
-                        }
-                
-                raise HTTPException(status_code=404, detail="Order not found")
-                
-            except:
-                raise HTTPException(status_code=404, detail="Order not found")
-        else:
+        if record is None:
             raise HTTPException(status_code=404, detail="Order not found")
         
+        return {
+            "order_id": record.get("Order ID"),
+            "customer_name": record.get("Customer Name"),
+            "customer_phone": record.get("Phone"),
+            "customer_email": record.get("Email"),
+            "business_name": record.get("Business Name", ""),
+            "quantity": int(record.get("Quantity", 0) or 0),
+            "subtotal": record.get("Subtotal", "$0.00"),
+            "discount": record.get("Discount", "$0.00"),
+            "total": record.get("Total", "$0.00"),
+            "delivery_address": record.get("Delivery Address"),
+            "status": record.get("Status", "Planning"),
+            "order_date": record.get("Order Date"),
+            "notes": record.get("Notes", "")
+        }
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -2289,11 +2776,60 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Long-running tasks started on startup, cancelled on shutdown
+startup_tasks: List[asyncio.Task] = []
+
 @app.on_event("startup")
 async def startup_event():
     await seed_database()
+    await distance_cache.ensure_indexes()
+    await db.leads.create_index("phone")
+    await db.orders.create_index("order_id")
+    try:
+        # One order per checkout session; orders created outside Stripe have no session_id
+        await db.orders.create_index(
+            "session_id", unique=True, partialFilterExpression={"session_id": {"$type": "string"}}
+        )
+    except OperationFailure as e:
+        # Without the index a replayed webhook could create a second order, so refuse to start
+        duplicates = await db.orders.aggregate([
+            {"$match": {"session_id": {"$type": "string"}}},
+            {"$group": {"_id": "$session_id", "order_ids": {"$push": "$order_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$limit": 20}
+        ]).to_list(20)
+        for duplicate in duplicates:
+            logger.error(f"Checkout session {duplicate['_id']} has several orders: {', '.join(map(str, duplicate['order_ids']))}")
+        raise RuntimeError(
+            f"Could not create unique orders.session_id index; remove the duplicate orders and restart: {str(e)}"
+        ) from e
+    await db.lead_phone_index.create_index(
+        [("sheet_url", 1), ("e164", 1)], unique=True, partialFilterExpression={"e164": {"$type": "string"}}
+    )
+    await job_queue.ensure_indexes()
+    try:
+        get_distance_service()
+        if os.environ.get('DISTANCE_CACHE_WARMUP', 'true').lower() == 'true':
+            startup_tasks.append(asyncio.create_task(warm_distance_cache()))
+    except ValueError as e:
+        logger.warning(f"Distance service not available: {str(e)}")
+    get_append_queue().start()
+    job_queue.start()
+    sheet_url = os.environ.get('GOOGLE_SHEETS_URL')
+    if sheet_url and os.environ.get('ORDER_STATUS_RECONCILE', 'true').lower() == 'true':
+        startup_tasks.append(asyncio.create_task(order_reconciler.run_forever(sheet_url)))
+    if os.environ.get('STRIPE_PAYMENT_RECONCILE', 'true').lower() == 'true':
+        startup_tasks.append(asyncio.create_task(stripe_payment_reconciler.run_forever()))
     logger.info("Backend startup complete")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in startup_tasks:
+        task.cancel()
+    await job_queue.stop()
+    if distance_service is not None:
+        await distance_service.aclose()
+    # Final flush of rows still waiting for Google Sheets
+    await asyncio.to_thread(get_append_queue().stop)
+    get_sheets_executor().shutdown()
     client.close()
\ No newline at end of file
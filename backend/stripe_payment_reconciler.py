@@ -0,0 +1,170 @@
+"""
+Stripe checkout <-> MongoDB payment reconciliation
+Pages through recent Stripe checkout sessions and brings payment_transactions up to date, creating
+the order for paid sessions whose webhook and confirmation page never reached the backend
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import stripe
+from pymongo import UpdateOne
+
+from leader_lease import LeaderLease
+
+logger = logging.getLogger(__name__)
+
+STRIPE_RECONCILE_INTERVAL_SECONDS = float(os.environ.get('STRIPE_RECONCILE_INTERVAL_SECONDS', '900'))
+# Checkout sessions expire after 24 hours, so two days covers every session that can still change
+STRIPE_RECONCILE_LOOKBACK_HOURS = float(os.environ.get('STRIPE_RECONCILE_LOOKBACK_HOURS', '48'))
+
+# (session ID, payment status, metadata, amount total in cents) -> (order ID, created)
+CreateOrder = Callable[[str, str, Dict[str, str], int], Awaitable[Tuple[str, bool]]]
+
+
+def transaction_payment_status(session) -> str:
+    """
+    payment_transactions status for a checkout session: "expired" or Stripe's payment_status.
+    Works on Stripe sessions and CheckoutStatusResponse alike; every writer of payment_status uses it.
+    """
+    return "expired" if session.status == "expired" else session.payment_status
+
+
+class StripePaymentReconciler:
+    """Periodic bulk sync from Stripe checkout sessions to payment_transactions and orders"""
+
+    def __init__(self, transactions_collection, orders_collection, create_order: CreateOrder, api_key: str,
+                 lease: Optional[LeaderLease] = None, lookback_hours: float = STRIPE_RECONCILE_LOOKBACK_HOURS):
+        """
+        Args:
+            transactions_collection: Motor collection of checkout transactions (db.payment_transactions)
+            orders_collection: Motor collection of paid orders (db.orders)
+            create_order: Idempotent order creation for a paid session (the webhook's create_paid_order)
+            api_key: Stripe secret key
+            lease: Leader lease; run_forever only reconciles while holding it (every process if omitted)
+            lookback_hours: How far back to list checkout sessions
+        """
+        self.transactions = transactions_collection
+        self.orders = orders_collection
+        self.create_order = create_order
+        self.api_key = api_key
+        self.lease = lease
+        self.lookback_hours = lookback_hours
+        self.last_run: Optional[Dict] = None
+        self.stats_counters = {
+            'runs': 0,
+            'statuses_updated': 0,
+            'orders_created': 0,
+            'errors': 0
+        }
+
+    def _list_sessions(self, since: datetime) -> List:
+        """Every checkout session created since `since`, 100 per Stripe request (blocking)"""
+        sessions = stripe.checkout.Session.list(
+            created={"gte": int(since.timestamp())}, limit=100, api_key=self.api_key
+        )
+        return list(sessions.auto_paging_iter())
+
+    async def reconcile(self) -> Dict:
+        """
+        Run one reconciliation pass.
+
+        Returns:
+            Dict with sessions, statuses_updated, orders_created and errors
+        """
+        since = datetime.now(timezone.utc) - timedelta(hours=self.lookback_hours)
+        sessions = await asyncio.to_thread(self._list_sessions, since)
+        session_ids = [session.id for session in sessions]
+
+        # Only sessions this app created have a transaction; anything else on the account is ignored
+        transactions = {
+            doc["session_id"]: doc
+            async for doc in self.transactions.find(
+                {"session_id": {"$in": session_ids}}, {"_id": 0, "session_id": 1, "payment_status": 1}
+            )
+        }
+        ordered = {
+            doc["session_id"]
+            async for doc in self.orders.find({"session_id": {"$in": session_ids}}, {"_id": 0, "session_id": 1})
+        }
+
+        now = datetime.now(timezone.utc).isoformat()
+        operations = []
+        unfulfilled = []
+        for session in sessions:
+            transaction = transactions.get(session.id)
+            if transaction is None:
+                continue
+            payment_status = transaction_payment_status(session)
+            if session.payment_status == "paid" and session.id not in ordered:
+                unfulfilled.append(session)
+            elif payment_status != transaction.get("payment_status"):
+                operations.append(UpdateOne(
+                    {"session_id": session.id},
+                    {"$set": {"payment_status": payment_status, "updated_at": now}}
+                ))
+        if operations:
+            await self.transactions.bulk_write(operations, ordered=False)
+
+        # Same idempotent path as the webhook, which also records the payment on the transaction;
+        # one bad session must not hold back the orders of the others
+        created = errors = 0
+        for session in unfulfilled:
+            try:
+                order_id, was_created = await self.create_order(
+                    session.id, session.payment_status, dict(session.metadata or {}), session.amount_total
+                )
+            except Exception as e:
+                errors += 1
+                logger.error(f"Could not create the order for paid checkout session {session.id}: {str(e)}")
+                continue
+            if was_created:
+                created += 1
+                logger.warning(f"Created missing Order #{order_id} for paid checkout session {session.id}")
+
+        result = {
+            'sessions': len(sessions),
+            'statuses_updated': len(operations),
+            'orders_created': created,
+            'errors': errors,
+            'finished_at': now
+        }
+        self.stats_counters['runs'] += 1
+        self.stats_counters['statuses_updated'] += len(operations)
+        self.stats_counters['orders_created'] += created
+        self.stats_counters['errors'] += errors
+        self.last_run = result
+        if operations or created or errors:
+            logger.info(f"Reconciled Stripe payments: {len(operations)} status update(s), {created} order(s) created, "
+                        f"{errors} error(s)")
+        return result
+
+    async def run_forever(self, interval: float = STRIPE_RECONCILE_INTERVAL_SECONDS):
+        """Reconcile every `interval` seconds until cancelled, only while holding the leader lease"""
+        try:
+            while True:
+                try:
+                    if self.lease is None or await self.lease.acquire():
+                        await self.reconcile()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.stats_counters['errors'] += 1
+                    logger.error(f"Stripe payment reconciliation failed: {str(e)}")
+                await asyncio.sleep(interval)
+        finally:
+            if self.lease is not None:
+                try:
+                    await self.lease.release()
+                except Exception as e:
+                    logger.warning(f"Could not release the Stripe reconciliation lease: {str(e)}")
+
+    def stats(self) -> Dict:
+        """Run counters and the outcome of the last pass for monitoring"""
+        return {
+            **self.stats_counters,
+            'leader': self.lease is None or self.lease.held,
+            'last_run': self.last_run
+        }
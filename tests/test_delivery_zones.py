@@ -0,0 +1,37 @@
+import pytest
+
+from delivery_zones import DEFAULT_DELIVERY_ZONES, AddressMatcher
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return AddressMatcher(DEFAULT_DELIVERY_ZONES)
+
+
+@pytest.mark.parametrize("address, zone", [
+    ("Half Way Tree, St. Andrew", "Half Way Tree"),
+    ("Havendale, St Andrew", "Havendale"),
+    ("Portmore, St Catherine", "Portmore"),
+    ("Spanish Town, St. Catherine", "Spanish Town"),
+    ("Mona Heights, St Andrew", "Mona"),
+    ("5 Patrick City St Andrew", "Patrick City"),
+    ("12 Duhaney Park, St. Andrew", "Duhaney Park"),
+    ("Cooreville Gardens, St Andrew", "Cooreville Gardens"),
+])
+def test_parish_suffix_is_not_a_street(matcher, address, zone):
+    assert matcher.classify(address) == zone
+
+
+@pytest.mark.parametrize("address", [
+    "45 Spanish Town Road, Kingston 11",
+    "Molynes Rd, Kingston 10",
+    "3 Constant Spring St, Kingston",
+    "Downtown Montego Bay, St James",
+    "Mona, Clarendon",
+])
+def test_streets_and_other_towns_do_not_match(matcher, address):
+    assert matcher.classify(address) is None
+
+
+def test_streets_inside_washington_gardens_are_free(matcher):
+    assert matcher.is_washington_gardens("20 Washington Gardens Drive, St Andrew")
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from distance_matrix_store import DistanceMatrixStore
+
+
+def route(km):
+    return {'distance_meters': int(km * 1000), 'duration_seconds': int(km * 120)}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DistanceMatrixStore(str(tmp_path), capacity=2, ttl_seconds=3600)
+
+
+def test_depot_route_round_trip(store):
+    assert store.depot_route('a') is None
+    store.add('a', {**route(5), 'lat': 18.0, 'lng': -76.8})
+    # Coordinates are stored as float32
+    assert store.depot_route('a') == pytest.approx(
+        {'distance_meters': 5000, 'duration_seconds': 600, 'lat': 18.0, 'lng': -76.8}, abs=1e-4
+    )
+
+
+def test_often_requested_address_displaces_least_used(store):
+    for key in ('a', 'b'):
+        store.add(key, route(1))
+        for _ in range(4):
+            assert store.depot_route(key) is not None
+
+    admitted_after = None
+    for attempt in range(1, 51):
+        assert store.depot_route('c') is None
+        if store.wants('c') and store.add('c', route(2)) is not None:
+            admitted_after = attempt
+            break
+
+    assert admitted_after is not None and admitted_after <= 6
+    assert store.depot_route('c') is not None
+    assert store.stats()['evicted'] == 1
+    assert store.stats()['rejected'] == 0
+
+
+def test_rarely_requested_address_is_rejected(store):
+    for key in ('a', 'b'):
+        store.add(key, route(1))
+        for _ in range(4):
+            store.depot_route(key)
+
+    store.depot_route('c')
+    assert not store.wants('c')
+    assert store.add('c', route(2)) is None
+    assert store.stats()['rejected'] == 1
+    assert store.depot_route('a') is not None
+
+
+def test_expired_slot_is_not_served_and_is_reused(tmp_path):
+    store = DistanceMatrixStore(str(tmp_path), capacity=1, ttl_seconds=0)
+    store.add('a', route(1))
+    assert store.depot_route('a') is None
+    assert store.wants('b')
+    assert store.add('b', route(2)) == 1
+    assert store.stats()['evicted'] == 1
+
+
+def test_measured_legs_are_shared_between_stored_addresses(tmp_path, store):
+    store.add('a', route(1))
+    store.add('b', route(2))
+    legs = np.array([[0.0, 3.5, 9.0], [3.7, 0.0, 9.0], [9.0, 9.0, 0.0]])
+    assert store.add_legs(['a', 'b', 'unstored'], legs) == 2
+
+    other_worker = DistanceMatrixStore(str(tmp_path))
+    pairs = other_worker.pair_matrix(['a', 'b', 'unstored'])
+    np.testing.assert_allclose(pairs[1:3, 1:3], [[0.0, 3.5], [3.7, 0.0]], rtol=1e-6)
+    np.testing.assert_allclose(pairs[0, 1:3], [1.0, 2.0], rtol=1e-6)
+    assert np.isnan(pairs[3, 1:]).all()